@@ -1,24 +1,93 @@
-from shiny import App, ui, reactive
-from tango import TangoBoard 
-import random, json
+from shiny import App, ui, reactive, render
+from tango_core import TangoBoard
+from concurrent.futures import ProcessPoolExecutor
+import asyncio, collections, functools, os, random
 
-# Game instance ----------------------------------------------------------------
+# Worker processes ---------------------------------------------------------------
 
 BOARD_SIZE = 6 # Default value
-_game = TangoBoard(n=BOARD_SIZE)
+POOL_SIZE = 64 # Ready boards kept in reserve
+WORKERS = max(1, (os.cpu_count() or 2) - 1) # Processes generating and solving boards
+
+# One process pool per kind of job: pending pool refills would otherwise sit
+# ahead of a Solve click in a shared FIFO queue.
+_executors = {}
+
+def _get_executor(kind):
+    # Each worker reseeds the shared generator; forked workers would
+    # otherwise all draw the same boards.
+    if kind not in _executors:
+        _executors[kind] = ProcessPoolExecutor(max_workers=WORKERS, initializer=random.seed)
+    return _executors[kind]
+
+def run_in_worker(kind, func, *args, **kwargs):
+    """
+    Runs func in a worker process of the kind ('generate' or 'solve') pool
+    and returns a concurrent future for its result. Await it through
+    asyncio.wrap_future, which leaves the event loop free for every other
+    session meanwhile.
+    """
+    return _get_executor(kind).submit(functools.partial(func, *args, **kwargs))
+
+# Board pool -------------------------------------------------------------------
+
+class BoardPool:
+    """
+    Keeps boards queued or ready in the worker processes, so a session
+    usually gets one that was generated before it asked.
+    """
+    def __init__(self, size, **board_args):
+        self._size = size
+        self._board_args = board_args
+        self._boards = collections.deque()
+
+    def fill(self):
+        # Oldest first: the board handed out next is the one most likely done.
+        while len(self._boards) < self._size:
+            self._boards.append(run_in_worker('generate', TangoBoard, **self._board_args))
+
+    async def get(self):
+        self.fill()
+        board = self._boards.popleft()
+        self.fill()
+        return await asyncio.wrap_future(board)
+
+_pool = BoardPool(POOL_SIZE, n=BOARD_SIZE)
+# Start generating as soon as the server loads the app, so the first session
+# finds boards on their way or ready instead of waiting for a generation.
+_pool.fill()
 
 # UI helpers
 
 def render_board():
+    # Cells start blank; each session fills them in with its own board.
     rows = []
     for r in range(BOARD_SIZE):
-        tds = [ui.html("td", {
+        tds = [ui.tags.td({
                     "id": f"cell-{r}-{c}",
                     "class": "cell",
                     "style": "width:45px;height:45px;border:1px solid #555;text-align:center;cursor:pointer;"
-                }, ui.HTML(_game.cell_symbol(r, c))) for c in range(BOARD_SIZE)]
-        rows.append(ui.html("tr", tds))
-    return ui.html("table", {"style": "border-collapse:collapse;margin:auto;"}, rows)
+                }, ui.HTML("")) for c in range(BOARD_SIZE)]
+        rows.append(ui.tags.tr(tds))
+    return ui.tags.table({"id": "board", "style": "border-collapse:collapse;margin:auto;"}, rows)
+
+# Front‑end helper js 
+
+custom_js = ui.tags.script("""
+Shiny.addCustomMessageHandler('update-board', function(msg){
+  for(const cell of msg.cells){
+    const el = document.getElementById(cell.id);
+    if(el){ el.innerHTML = cell.html; }
+  }
+});
+Shiny.addCustomMessageHandler('board-pending', function(msg){
+  document.getElementById('board').style.opacity = msg.pending ? 0.4 : 1;
+  document.getElementById('board-status').textContent = msg.text;
+  for(const id of ['random', 'solve']){
+    document.getElementById(id).disabled = msg.pending;
+  }
+});
+""")
 
 # -----------------------------------------------------------------------------
 # Layout -----------------------------------------------------------------------
@@ -31,10 +100,11 @@ app_ui = ui.page_fluid(
     # Game & controls div
     ui.div({"style": "text-align:center;margin-top:20px;"},
         render_board(),
-        ui.br(),
+        ui.div({"id": "board-status", "style": "min-height:1.5em;margin-top:8px;color:#666;"}),
         ui.input_action_button("new", "New Board", class_="btn btn-primary me-2"),
         ui.input_action_button("random", "Toggle Random", class_="btn btn-secondary me-2"),
-        ui.input_download_button("save", "Save JSON", class_="btn btn-outline-success"),
+        ui.input_action_button("solve", "Solve", class_="btn btn-secondary me-2"),
+        ui.download_button("save", "Save JSON", class_="btn btn-outline-success"),
     ),
 
     # Instructions div
@@ -46,51 +116,107 @@ app_ui = ui.page_fluid(
     # Disclaimer div
     ui.div({"style": "text-align:center;font-size:0.8rem;color:#666;margin:40px 0;"},
         "Unofficial fan adaptation; all LinkedIn Tango trademarks belong to their respective owners."),
+
+    custom_js,
 )
 
 # Server logic -----------------------------------------------------------------
 
 def server(input, output, session):
 
-    # ---------- create a fresh board ----------------------------------------
+    # Game state belongs to this browser session only; None while the first
+    # board is still being generated.
+    game = None
+    # Status line shown under the board once nothing is pending.
+    notice = reactive.Value("")
+
+    async def send_cells(cells):
+        # One message per update rather than one per cell.
+        await session.send_custom_message("update-board", {"cells": [
+            {"id": f"cell-{r}-{c}", "html": game.cell_symbol(r, c)} for r, c in cells
+        ]})
+
+    async def send_board():
+        await send_cells([(r, c) for r in range(BOARD_SIZE) for c in range(BOARD_SIZE)])
+
+    # Generation and solving run in worker processes. Clicking again cancels
+    # the pending request; a worker that already started finishes in the
+    # background and its result is dropped.
+    @reactive.extended_task
+    async def next_board():
+        return await _pool.get()
+
+    @reactive.extended_task
+    async def solve_game(board):
+        return await asyncio.wrap_future(run_in_worker('solve', board.solved))
+
+    # ---------- pending state ------------------------------------------------
+    @reactive.Effect
+    async def _():
+        if next_board.status() == "running":
+            text = "Generating board…"
+        elif solve_game.status() == "running":
+            text = "Solving…"
+        else:
+            text = None
+        await session.send_custom_message("board-pending", {
+            "pending": text is not None,
+            "text": notice() if text is None else text
+        })
+
+    # ---------- create a fresh board (also this session's first) -------------
     @reactive.Effect
-    @reactive.event(input.new)
+    @reactive.event(input.new, ignore_none=False)
     def _():
-        global _game
-        _game = TangoBoard(n=BOARD_SIZE)
-        for r in range(BOARD_SIZE):
-            for c in range(BOARD_SIZE):
-                session.send_custom_message("update-cell", {
-                    "id": f"cell-{r}-{c}",
-                    "html": _game.cell_symbol(r, c)
-                })
+        notice.set("")
+        solve_game.cancel()
+        next_board.cancel()
+        next_board.invoke()
+
+    @reactive.Effect
+    async def _():
+        nonlocal game
+        game = next_board.result()
+        await send_board()
+
+    # ---------- solve the current position -----------------------------------
+    @reactive.Effect
+    @reactive.event(input.solve)
+    def _():
+        if game is not None:
+            notice.set("")
+            solve_game.cancel()
+            solve_game.invoke(game)
+
+    @reactive.Effect
+    async def _():
+        nonlocal game
+        solved = solve_game.result()
+        if solved is None:
+            notice.set("No solution from this position.")
+        else:
+            game = solved
+            await send_board()
 
     # ---------- toggle a random editable cell -------------------------------
     @reactive.Effect
     @reactive.event(input.random)
-    def _():
+    async def _():
+        if game is None:
+            return
+        # A solve started before this edit would overwrite it.
+        notice.set("")
+        solve_game.cancel()
         editable = [(r, c) for r in range(BOARD_SIZE) for c in range(BOARD_SIZE)
-                     if (r, c, 0) not in _game.known_cells and (r, c, 1) not in _game.known_cells]
+                     if (r, c, 0) not in game.known_cells and (r, c, 1) not in game.known_cells]
         if editable:
             r, c = random.choice(editable)
-            _game.toggle_cell(r, c)
-            session.send_custom_message("update-cell", {
-                "id": f"cell-{r}-{c}",
-                "html": _game.cell_symbol(r, c)
-            })
+            game.toggle_cell(r, c)
+            await send_cells([(r, c)])
 
     # ---------- download -----------------------------------------------------
-    @session.download(filename=lambda: "tango_board.json")
+    @render.download(filename="tango_board.json")
     def save():
-        yield _game.to_json()
+        yield game.to_json() if game is not None else "{}"
       
-# Front‑end helper js 
-
-custom_js = ui.tags.script("""
-Shiny.addCustomMessageHandler('update-cell', function(msg){
-  const el = document.getElementById(msg.id);
-  if(el){ el.innerHTML = msg.html; }
-});
-""")
-
-app = App(app_ui + [custom_js], server)
+app = App(app_ui, server)
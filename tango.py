@@ -1,444 +1,42 @@
-import math
 import random
-import tkinter as tk
-from tkinter import messagebox, Button, Frame, Toplevel, Label, Entry, Checkbutton, Radiobutton, IntVar, StringVar, filedialog
-import json
-import os
-
-def has_positive_integer_sqrt_binary_search(num):
-    """
-    Checks if an integer has a positive integer square root using binary search.
-    """
-    if num < 0:
-        return False
-    if num == 0:
-        return True
-    low = 1
-    high = num
-    while low <= high:
-        mid = (low + high) // 2
-        square = mid * mid
-        if square == num:
-            return True
-        elif square < num:
-            low = mid + 1
-        else:
-            high = mid - 1
-    return False
-
-class TangoBoard:
-    def __init__(self, n=6, known_cells=21, relations=8, adjacency_limit=2):
-        # Refactorized code, generate a filled board first then empty it.
-        if not has_positive_integer_sqrt_binary_search(n * n):
-            raise ValueError("Board size must be a perfect square.")
-        if n % 2 != 0:
-            raise ValueError("Board side length must be even")
-        self.n = n
-        self.size = n * n
-        self.valid_num = adjacency_limit  # Configurable adjacency limit
-        self.solution = self.generate_solution()        
-        self.board = [[-1 for _ in range(n)] for _ in range(n)]
-        self.relations = self.create_relations_from_solution(relations)
-        self.board, self.row_counts, self.col_counts, self.known_cells = \
-            self.make_puzzle_board(known_cells)
-    
-    def generate_solution(self):
-        # Return a completely filled, valid n × n board.
-        board = [[-1]*self.n for _ in range(self.n)]
-        row_ct  = [[0,0] for _ in range(self.n)]
-        col_ct  = [[0,0] for _ in range(self.n)]
-
-        def backtrack(pos: int) -> bool:
-            if pos == self.size:
-                return True
-            r, c = divmod(pos, self.n)
-            for val in (0,1):
-                if row_ct[r][val] < self.n//2 and col_ct[c][val] < self.n//2 \
-                   and self.is_valid_position_local(board, r, c, val):
-                    board[r][c] = val
-                    row_ct[r][val] += 1
-                    col_ct[c][val] += 1
-                    if backtrack(pos+1):
-                        return True
-                    board[r][c] = -1
-                    row_ct[r][val] -= 1
-                    col_ct[c][val] -= 1
-            return False
-
-        backtrack(0)
-        return board
-        
-    def is_valid_position(self, row, col, value):
-        # Horizontal checks
-        if col >= 2 and self.board[row][col-1] == value and self.board[row][col-2] == value:
-            return False
-        if col <= self.n-3 and self.board[row][col+1] == value and self.board[row][col+2] == value:
-            return False
-        if col >= 1 and col <= self.n-2 and self.board[row][col-1] == value and self.board[row][col+1] == value:
-            return False
-        # Vertical checks
-        if row >= 2 and self.board[row-1][col] == value and self.board[row-2][col] == value:
-            return False
-        if row <= self.n-3 and self.board[row+1][col] == value and self.board[row+2][col] == value:
-            return False
-        if row >= 1 and row <= self.n-2 and self.board[row-1][col] == value and self.board[row+1][col] == value:
-            return False
-        # General adjacency check for valid_num
-        count = 1
-        for c in range(col-1, -1, -1):
-            if self.board[row][c] == value:
-                count += 1
-            else:
-                break
-            if count > self.valid_num:
-                return False
-        count = 1
-        for c in range(col+1, self.n):
-            if self.board[row][c] == value:
-                count += 1
-            else:
-                break
-            if count > self.valid_num:
-                return False
-        count = 1
-        for r in range(row-1, -1, -1):
-            if self.board[r][col] == value:
-                count += 1
-            else:
-                break
-            if count > self.valid_num:
-                return False
-        count = 1
-        for r in range(row+1, self.n):
-            if self.board[r][col] == value:
-                count += 1
-            else:
-                break
-            if count > self.valid_num:
-                return False
-        return True
-    def is_valid_position_local(self,b, row, col, value):
-        # Horizontal checks
-        if col >= 2 and b[row][col-1] == value and b[row][col-2] == value:
-            return False
-        if col <= self.n-3 and b[row][col+1] == value and b[row][col+2] == value:
-            return False
-        if col >= 1 and col <= self.n-2 and b[row][col-1] == value and b[row][col+1] == value:
-            return False
-        # Vertical checks
-        if row >= 2 and b[row-1][col] == value and b[row-2][col] == value:
-            return False
-        if row <= self.n-3 and b[row+1][col] == value and b[row+2][col] == value:
-            return False
-        if row >= 1 and row <= self.n-2 and b[row-1][col] == value and b[row+1][col] == value:
-            return False
-        # General adjacency check for valid_num
-        count = 1
-        for c in range(col-1, -1, -1):
-            if b[row][c] == value:
-                count += 1
-            else:
-                break
-            if count > self.valid_num:
-                return False
-        count = 1
-        for c in range(col+1, self.n):
-            if b[row][c] == value:
-                count += 1
-            else:
-                break
-            if count > self.valid_num:
-                return False
-        count = 1
-        for r in range(row-1, -1, -1):
-            if b[r][col] == value:
-                count += 1
-            else:
-                break
-            if count > self.valid_num:
-                return False
-        count = 1
-        for r in range(row+1, self.n):
-            if b[r][col] == value:
-                count += 1
-            else:
-                break
-            if count > self.valid_num:
-                return False
-        return True
-
-    def initialize_puzzle(self, known_cells, relations):
-        self.row_counts = [[0, 0] for _ in range(self.n)]
-        self.col_counts = [[0, 0] for _ in range(self.n)]
-
-        all_positions = [(r, c) for r in range(self.n) for c in range(self.n)]
-        selected_positions = []
-        attempts = 0
-        while len(selected_positions) < known_cells and attempts < 1000:
-            pos = random.choice(all_positions)
-            r, c = pos
-            value = self.board[r][c]
-            temp_row_counts = [row[:] for row in self.row_counts]
-            temp_col_counts = [col[:] for col in self.col_counts]
-            temp_row_counts[r][value] += 1
-            temp_col_counts[c][value] += 1
-            if temp_row_counts[r][value] <= self.n//2 and temp_col_counts[c][value] <= self.n//2:
-                selected_positions.append(pos)
-                self.row_counts[r][value] += 1
-                self.col_counts[c][value] += 1
-                all_positions.remove(pos)
-            attempts += 1
-
-        self.known_cells = [(r, c, self.board[r][c]) for r, c in selected_positions]
-
-        possible_relations = []
-        for r in range(self.n):
-            for c in range(self.n):
-                if c < self.n - 1:
-                    possible_relations.append(((r, c), (r, c+1)))
-                if r < self.n - 1:
-                    possible_relations.append(((r, c), (r+1, c)))
-        selected = random.sample(possible_relations, min(relations, len(possible_relations)))
-        relation_counts_row = [0] * self.n
-        relation_counts_col = [0] * self.n
-        for (r1, c1), (r2, c2) in selected:
-            if self.board[r1][c1] == self.board[r2][c2]:
-                rel = '='
-                if r1 == r2:
-                    if relation_counts_row[r1] >= self.n//2 - 1:
-                        continue
-                    relation_counts_row[r1] += 1
-                else:
-                    if relation_counts_col[c1] >= self.n//2 - 1:
-                        continue
-                    relation_counts_col[c1] += 1
-            else:
-                rel = '×'
-            self.relations[((r1, c1), (r2, c2))] = rel
-
-        self.board = [[-1 for _ in range(self.n)] for _ in range(self.n)]
-        for r, c, val in self.known_cells:
-            self.board[r][c] = val
-
-    def solve(self):
-        def backtrack(pos):
-            if pos == self.size:
-                return all(self.row_counts[r][0] == self.n//2 and self.row_counts[r][1] == self.n//2 for r in range(self.n)) and \
-                       all(self.col_counts[c][0] == self.n//2 and self.col_counts[c][1] == self.n//2 for c in range(self.n))
-            row, col = divmod(pos, self.n)
-            if self.board[row][col] != -1:
-                return backtrack(pos + 1)
-            for value in [0, 1]:
-                if self.row_counts[row][value] < self.n//2 and self.col_counts[col][value] < self.n//2:
-                    if self.is_valid_position(row, col, value):
-                        self.board[row][col] = value
-                        self.row_counts[row][value] += 1
-                        self.col_counts[col][value] += 1
-                        if self.propagate_relations(row, col, value):
-                            if backtrack(pos + 1):
-                                return True
-                        self.board[row][col] = -1
-                        self.row_counts[row][value] -= 1
-                        self.col_counts[col][value] -= 1
-            return False
-
-        return backtrack(0)
-
-    def propagate_relations(self, row, col, value):
-        for (r1, c1), (r2, c2) in self.relations:
-            if (r1, c1) == (row, col):
-                other_r, other_c = r2, c2
-            elif (r2, c2) == (row, col):
-                other_r, other_c = r1, c1
-            else:
-                continue
-            rel = self.relations[((r1, c1), (r2, c2))]
-            if self.board[other_r][other_c] == -1:
-                new_value = value if rel == '=' else 1 - value
-                if self.row_counts[other_r][new_value] < self.n//2 and self.col_counts[other_c][new_value] < self.n//2:
-                    if self.is_valid_position(other_r, other_c, new_value):
-                        self.board[other_r][other_c] = new_value
-                        self.row_counts[other_r][new_value] += 1
-                        self.col_counts[other_c][new_value] += 1
-                    else:
-                        return False
-                else:
-                    return False
-            else:
-                if rel == '=' and self.board[other_r][other_c] != value:
-                    return False
-                if rel == '×' and self.board[other_r][other_c] == value:
-                    return False
-        return True
-
-    def toggle_cell(self, row, col):
-        if (row, col, 0) in self.known_cells or (row, col, 1) in self.known_cells:
-            return
-
-        current = self.board[row][col]
-        if current != -1:
-            self.row_counts[row][current] -= 1
-            self.col_counts[col][current] -= 1
-
-        if current == -1:
-            new_value = 0
-        elif current == 0:
-            new_value = 1
-        else:
-            new_value = -1
-
-        self.board[row][col] = new_value
-        if new_value != -1:
-            self.row_counts[row][new_value] += 1
-            self.col_counts[col][new_value] += 1
-
-    def make_puzzle_board(self, known_cells):
-        """Return (board,row_counts,col_counts,known_cells) ready for play."""
-        board = [[-1]*self.n for _ in range(self.n)]
-        row_ct = [[0,0] for _ in range(self.n)]
-        col_ct = [[0,0] for _ in range(self.n)]
-
-        all_pos = [(r,c) for r in range(self.n) for c in range(self.n)]
-        selected = random.sample(all_pos, min(known_cells, len(all_pos)))
-
-        known = []
-        for r,c in selected:
-            val = self.solution[r][c]
-            board[r][c] = val
-            row_ct[r][val] += 1
-            col_ct[c][val] += 1
-            known.append((r,c,val))
-
-        return board, row_ct, col_ct, known
-
-    def is_valid_board(self):
-        for i in range(self.n):
-            if self.row_counts[i][0] > self.n//2 or self.row_counts[i][1] > self.n//2:
-                return False
-            if self.col_counts[i][0] > self.n//2 or self.col_counts[i][1] > self.n//2:
-                return False
-        filled = sum(1 for row in self.board for cell in row if cell != -1)
-        if filled == self.size:
-            if not all(self.row_counts[r][0] == self.n//2 and self.row_counts[r][1] == self.n//2 for r in range(self.n)):
-                return False
-            if not all(self.col_counts[c][0] == self.n//2 and self.col_counts[c][1] == self.n//2 for c in range(self.n)):
-                return False
-
-        for r in range(self.n):
-            for c in range(self.n):
-                if self.board[r][c] != -1:
-                    value = self.board[r][c]
-                    count = 1
-                    for cc in range(c-1, -1, -1):
-                        if self.board[r][cc] == value:
-                            count += 1
-                        else:
-                            break
-                        if count > self.valid_num:
-                            return False
-                    count = 1
-                    for cc in range(c+1, self.n):
-                        if self.board[r][cc] == value:
-                            count += 1
-                        else:
-                            break
-                        if count > self.valid_num:
-                            return False
-                    count = 1
-                    for rr in range(r-1, -1, -1):
-                        if self.board[rr][c] == value:
-                            count += 1
-                        else:
-                            break
-                        if count > self.valid_num:
-                            return False
-                    count = 1
-                    for rr in range(r+1, self.n):
-                        if self.board[rr][c] == value:
-                            count += 1
-                        else:
-                            break
-                        if count > self.valid_num:
-                            return False
-
-        for (r1, c1), (r2, c2) in self.relations:
-            if self.board[r1][c1] != -1 and self.board[r2][c2] != -1:
-                rel = self.relations[((r1, c1), (r2, c2))]
-                if rel == '=' and self.board[r1][c1] != self.board[r2][c2]:
-                    return False
-                if rel == '×' and self.board[r1][c1] == self.board[r2][c2]:
-                    return False
-
-        return True
-
-    def save_board(self, filename):
-        """
-        Saves the current board state to a file.
-        """
-        board_state = {
-            'n': self.n,
-            'valid_num': self.valid_num,
-            'board': self.board,
-            'relations': {f"{r1},{c1}->{r2},{c2}": rel for (r1, c1), (r2, c2) in self.relations for rel in [self.relations[((r1, c1), (r2, c2))]]},
-            'known_cells': self.known_cells,
-            'row_counts': self.row_counts,
-            'col_counts': self.col_counts,
-            'known_cells_count': self.known_cells_count,
-            'relations_count': self.relations_count
-        }
-        with open(filename, 'w') as f:
-            json.dump(board_state, f)
-
-    def load_board(self, filename):
-        """
-        Loads a board state from a file.
-        """
-        with open(filename, 'r') as f:
-            board_state = json.load(f)
-        self.n = board_state['n']
-        self.length = self.n
-        self.size = self.n * self.n
-        self.valid_num = board_state['valid_num']
-        self.board = board_state['board']
-        self.relations = {}
-        for key, rel in board_state['relations'].items():
-            coords = key.split('->')
-            pos1 = coords[0].split(',')
-            pos2 = coords[1].split(',')
-            r1, c1 = int(pos1[0]), int(pos1[1])
-            r2, c2 = int(pos2[0]), int(pos2[1])
-            self.relations[((r1, c1), (r2, c2))] = rel
-        self.known_cells = [(r, c, val) for r, c, val in board_state['known_cells']]
-        self.row_counts = board_state['row_counts']
-        self.col_counts = board_state['col_counts']
-        self.known_cells_count = board_state['known_cells_count']
-        self.relations_count = board_state['relations_count']
-    
-    def print_board_to_string(self):
-        """
-        Returns a string representation of the board and its relations.
-        """
-        board_str = "Board:\n"
-        for r in range(self.n):
-            row = []
-            for c in range(self.n):
-                if self.board[r][c] == 0:
-                    row.append("M")
-                elif self.board[r][c] == 1:
-                    row.append("S")
-                else:
-                    row.append(".")
-            board_str += " ".join(row) + "\n"
-        board_str += "\nRelations:\n"
-        for (r1, c1), (r2, c2) in self.relations:
-            board_str += f"({r1},{c1})-({r2},{c2}): {self.relations[((r1, c1), (r2, c2))]}\n"
-        return board_str
+import sys
+
+# The board engine lives in tango_core so headless callers can import it
+# without the GUI; its public API is re-exported here for existing imports.
+from tango_core import (
+    LOGIC_TIERS,
+    RESTART_BASE,
+    SolveStats,
+    TangoBoard,
+    has_positive_integer_sqrt_binary_search,
+    legal_row_patterns,
+)
+from tango_cache import SolveCache
+
+# tkinter is only needed by the GUI; it is imported on first use so that
+# headless callers (the batch CLI, the Shiny server) never load it.
+tk = None
+
+def _load_tk():
+    global tk, messagebox, Button, Frame, Toplevel, Label, Entry, Checkbutton, Radiobutton, IntVar, StringVar, filedialog
+    if tk is None:
+        import tkinter
+        from tkinter import messagebox, Button, Frame, Toplevel, Label, Entry, Checkbutton, Radiobutton, IntVar, StringVar, filedialog
+        tk = tkinter
 
 class TangoBoardGUI:
+    HINT_REASONS = {
+        'balance': "its row or column already holds half of the other symbol",
+        'pair': "the other symbol would make a run longer than the adjacency limit",
+        'relation': "an '=' or '×' link with a neighbour decides it",
+        'line': "every legal way to finish its row or column agrees",
+    }
+
     def __init__(self, master, board_size=6):
         """
         Initializes the GUI for the Tango board with random known cells and relations.
         """
+        _load_tk()
         self.master = master
         self.master.title("LinkedIn Tango Board")
         known_cells = random.randint(3, board_size*2)
@@ -450,6 +48,8 @@ class TangoBoardGUI:
         self.adjacency_limit = 2
         self.full_random = False
         self.board = TangoBoard(n=board_size, known_cells=known_cells, relations=relations, adjacency_limit=self.adjacency_limit)
+        # Solve results for every board shown in this window, by puzzle.
+        self.solve_cache = SolveCache(maxsize=256)
         self.cell_size = 50
         self.padding = 8
         self.update_canvas_size()
@@ -458,20 +58,24 @@ class TangoBoardGUI:
         self.canvas = tk.Canvas(self.frame, width=self.canvas_width, height=self.canvas_height,
                                 bg='white', borderwidth=0, highlightthickness=0)
         self.canvas.pack()
+        self.canvas.bind("<Button-1>", self.on_canvas_click)
+        self.cell_items = {}
         self.buttons_frame = Frame(master)
         self.buttons_frame.pack(pady=5)
         self.new_game_button = Button(self.buttons_frame, text="New Game", command=self.new_game)
         self.new_game_button.grid(row=0, column=0, padx=5)
         self.solve_button = Button(self.buttons_frame, text="Solve", command=self.solve_board)
         self.solve_button.grid(row=0, column=1, padx=5)
+        self.hint_button = Button(self.buttons_frame, text="Hint", command=self.show_hint)
+        self.hint_button.grid(row=0, column=2, padx=5)
         self.check_button = Button(self.buttons_frame, text="Check Validity", command=self.check_validity)
-        self.check_button.grid(row=0, column=2, padx=5)
+        self.check_button.grid(row=0, column=3, padx=5)
         self.save_button = Button(self.buttons_frame, text="Save Board", command=self.save_board)
-        self.save_button.grid(row=0, column=3, padx=5)
+        self.save_button.grid(row=0, column=4, padx=5)
         self.load_button = Button(self.buttons_frame, text="Load Board", command=self.load_board)
-        self.load_button.grid(row=0, column=4, padx=5)
+        self.load_button.grid(row=0, column=5, padx=5)
         self.settings_button = Button(self.buttons_frame, text="⚙️", command=self.open_settings)
-        self.settings_button.grid(row=0, column=5, padx=5)
+        self.settings_button.grid(row=0, column=6, padx=5)
         self.draw_board()
 
     def update_canvas_size(self):
@@ -543,26 +147,27 @@ class TangoBoardGUI:
             messagebox.showerror("Error", str(e))
 
     def draw_board(self):
+        """
+        Recreates every canvas item; only needed when a new board is shown.
+        """
         self.canvas.delete("all")
         self.canvas.config(width=self.canvas_width, height=self.canvas_height)
+        given = {(r, c) for r, c, _ in self.board.known_cells}
+        self.cell_items = {}
         for row in range(self.board.length):
             for col in range(self.board.length):
                 x1 = col * self.cell_size + self.padding
                 y1 = row * self.cell_size + self.padding
                 x2 = x1 + self.cell_size
                 y2 = y1 + self.cell_size
-                fill_color = 'lightgray' if (row, col, 0) in self.board.known_cells or (row, col, 1) in self.board.known_cells else 'white'
-                self.canvas.create_rectangle(x1, y1, x2, y2, outline='black', fill=fill_color)
-                cell_value = self.board.board[row][col]
-                if cell_value == 0:
-                    self.canvas.create_text(x1 + self.cell_size/2, y1 + self.cell_size/2,
-                                            text="M", font=('Arial', 20, 'bold'))
-                elif cell_value == 1:
-                    self.canvas.create_text(x1 + self.cell_size/2, y1 + self.cell_size/2,
-                                            text="S", font=('Arial', 20, 'bold'))
-
-        for (r1, c1), (r2, c2) in self.board.relations:
-            relation_type = self.board.relations[((r1, c1), (r2, c2))]
+                fill_color = 'lightgray' if (row, col) in given else 'white'
+                rect = self.canvas.create_rectangle(x1, y1, x2, y2, outline='black', fill=fill_color)
+                text = self.canvas.create_text(x1 + self.cell_size/2, y1 + self.cell_size/2,
+                                               text=self.board.cell_symbol(row, col),
+                                               font=('Arial', 20, 'bold'))
+                self.cell_items[(row, col)] = (rect, text)
+
+        for ((r1, c1), (r2, c2)), relation_type in self.board.relations.items():
             if r1 == r2:
                 x1 = (c1 + 1) * self.cell_size + self.padding
                 y1 = r1 * self.cell_size + self.cell_size/2 + self.padding
@@ -589,14 +194,26 @@ class TangoBoardGUI:
                     self.canvas.create_line(x1-5, y1-5, x2+5, y2+5, width=2)
                     self.canvas.create_line(x1+5, y1-5, x2-5, y2+5, width=2)
 
-        self.canvas.bind("<Button-1>", self.on_canvas_click)
+    def update_cell(self, row, col):
+        """
+        Refreshes the glyph of one cell in place.
+        """
+        _, text = self.cell_items[(row, col)]
+        self.canvas.itemconfigure(text, text=self.board.cell_symbol(row, col))
+
+    def refresh_cells(self):
+        """
+        Refreshes every glyph without recreating canvas items, e.g. after a solve.
+        """
+        for row, col in self.cell_items:
+            self.update_cell(row, col)
 
     def on_canvas_click(self, event):
         col = (event.x - self.padding) // self.cell_size
         row = (event.y - self.padding) // self.cell_size
         if 0 <= row < self.board.length and 0 <= col < self.board.length:
             self.board.toggle_cell(row, col)
-            self.draw_board()
+            self.update_cell(row, col)
 
     def new_game(self):
         if self.full_random:
@@ -610,21 +227,25 @@ class TangoBoardGUI:
         self.draw_board()
 
     def solve_board(self):
-        board_copy = [row[:] for row in self.board.board]
-        row_counts_copy = [counts[:] for counts in self.board.row_counts]
-        col_counts_copy = [counts[:] for counts in self.board.col_counts]
-        relations_copy = self.board.relations.copy()
-
-        if self.board.solve():
+        # A failed solve undoes its own trail, so the board is untouched.
+        if self.board.solve(cache=self.solve_cache):
             messagebox.showinfo("Success", "Board solved successfully!")
-            self.draw_board()
+            self.refresh_cells()
         else:
             messagebox.showinfo("Failed", "No solution exists for this board configuration.")
-            self.board.board = board_copy
-            self.board.row_counts = row_counts_copy
-            self.board.col_counts = col_counts_copy
-            self.board.relations = relations_copy
-            self.draw_board()
+
+    def show_hint(self):
+        # Fills in one forced cell and says which rule forces it.
+        hint = self.board.next_hint()
+        if hint is None:
+            messagebox.showinfo("Hint", "No cell is forced by the rules from this position.")
+            return
+        row, col, value, rule = hint
+        self.board.set_cell(row, col, value)
+        self.update_cell(row, col)
+        symbol = self.board.cell_symbol(row, col)
+        messagebox.showinfo("Hint", f"Row {row + 1}, column {col + 1} must be {symbol}: "
+                                    f"{self.HINT_REASONS[rule]}.")
 
     def check_validity(self):
         if self.board.is_valid_board():
@@ -677,9 +298,14 @@ class TangoBoardGUI:
         Button(print_window, text="Close", command=print_window.destroy).pack(pady=5)
 
 def run_tango_board():
+    _load_tk()
     root = tk.Tk()
     app = TangoBoardGUI(root, board_size=6)
     root.mainloop()
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # Headless subcommands, e.g. `python -m tango generate ...`
+        from tango_cli import main
+        sys.exit(main(sys.argv[1:]))
     run_tango_board()
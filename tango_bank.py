@@ -0,0 +1,341 @@
+"""
+Binary puzzle bank: fixed-size, bit-packed board records in one file.
+
+A bank holds boards of a single side length n and adjacency limit. Layout:
+
+    header   32 bytes: magic, version, n, adjacency limit, flags, record
+             size, record count and the offset of the index
+    records  count * record_size bytes, record k at HEADER_SIZE + k * record_size
+    index    (clues, relations, record) triples sorted by key, 8 bytes each
+
+Each record is: clue count (u16), relation count (u16), the solution as one
+bit per cell (S = 1), the givens as one bit per cell, then one 2-bit relation
+code per horizontal edge followed by one per vertical edge (0 none, 1 '=',
+2 '×'), all row-major and little-endian.
+
+The reader maps the file with mmap, so fetching puzzle #k touches only that
+record and lookups by clue/relation count binary-search the index in place.
+
+A writer sets FLAG_OPEN in the header before it writes anything else and
+clears it on close, so a bank whose writer never finished is rejected rather
+than read through a stale index. Records carry their own counts, so such a
+bank is repaired by rebuilding the index from the records: recover() does
+that, as does opening a PuzzleBankWriter on it. A torn last record is dropped.
+"""
+import mmap
+import os
+import struct
+
+MAGIC = b"TNGB"
+VERSION = 1
+# Header flag: a writer has the bank open, so its count and index are stale.
+FLAG_OPEN = 1
+_HEADER = struct.Struct("<4sHHHHIIQI")
+HEADER_SIZE = _HEADER.size
+_COUNTS = struct.Struct("<HH")
+_INDEX_ENTRY = struct.Struct("<HHI")
+
+def record_size(n):
+    """
+    Returns the size in bytes of one record for an n x n board.
+    """
+    cells = (n * n + 7) // 8
+    edges = (2 * 2 * n * (n - 1) + 7) // 8
+    return _COUNTS.size + 2 * cells + edges
+
+def record_fields(n):
+    """
+    Returns {field: (offset, size)} in bytes within one record for an n x n
+    board, for the fields "counts", "solution", "givens" and "edges".
+    """
+    cells = (n * n + 7) // 8
+    edges = (2 * 2 * n * (n - 1) + 7) // 8
+    return {
+        "counts": (0, _COUNTS.size),
+        "solution": (_COUNTS.size, cells),
+        "givens": (_COUNTS.size + cells, cells),
+        "edges": (_COUNTS.size + 2 * cells, edges),
+    }
+
+def _pack_record(n, solution, known_cells, h_rel, v_rel):
+    cells = (n * n + 7) // 8
+    edges = (2 * 2 * n * (n - 1) + 7) // 8
+    solution_bits = 0
+    for r in range(n):
+        for c in range(n):
+            if solution[r][c] == 1:
+                solution_bits |= 1 << (r * n + c)
+    given_bits = 0
+    for r, c, _ in known_cells:
+        given_bits |= 1 << (r * n + c)
+    edge_bits = 0
+    relations = 0
+    for i, code in enumerate(bytes(h_rel) + bytes(v_rel)):
+        if code:
+            edge_bits |= code << (2 * i)
+            relations += 1
+    return _COUNTS.pack(len(known_cells), relations) + solution_bits.to_bytes(cells, "little") + \
+        given_bits.to_bytes(cells, "little") + edge_bits.to_bytes(edges, "little")
+
+def _read_header(data, path):
+    """
+    Unpacks and checks the header at the start of data; returns
+    (n, adjacency_limit, flags, count, index_offset).
+    """
+    if len(data) < HEADER_SIZE:
+        raise ValueError(f"{path} is not a puzzle bank")
+    magic, version, n, limit, flags, size, count, index_offset, _ = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION or size != record_size(n):
+        raise ValueError(f"{path} is not a version {VERSION} puzzle bank")
+    return n, limit, flags, count, index_offset
+
+def _record_intact(n, record):
+    """
+    Checks that a record's counts match its givens and relations, which a
+    torn or stray write almost never preserves.
+    """
+    cells = (n * n + 7) // 8
+    clues, relations = _COUNTS.unpack_from(record, 0)
+    offset = _COUNTS.size + cells
+    given_bits = int.from_bytes(record[offset:offset + cells], "little")
+    edge_bits = int.from_bytes(record[offset + cells:], "little")
+    if given_bits >> (n * n) or bin(given_bits).count("1") != clues:
+        return False
+    found = 0
+    for i in range(2 * n * (n - 1)):
+        code = edge_bits >> (2 * i) & 3
+        if code == 3:
+            return False
+        found += code != 0
+    return found == relations and not edge_bits >> (4 * n * (n - 1))
+
+def recover(path):
+    """
+    Rebuilds the index of a bank whose writer was interrupted and clears its
+    FLAG_OPEN; returns the number of records kept. Closed banks are left as they are.
+    """
+    with open(path, "rb") as f:
+        n, limit, _, _, _ = _read_header(f.read(HEADER_SIZE), path)
+    writer = PuzzleBankWriter(path, n, limit)
+    writer.close()
+    return len(writer._index)
+
+class PuzzleBank:
+    """
+    Read-only, memory-mapped view of a puzzle bank file.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"{path} is not a puzzle bank") from None
+        try:
+            n, limit, flags, count, index_offset = _read_header(self._map, path)
+        except ValueError:
+            self.close()
+            raise
+        if flags & FLAG_OPEN:
+            self.close()
+            raise ValueError(f"{path} was not closed by its writer; tango_bank.recover() repairs it")
+        self.n = n
+        self.adjacency_limit = limit
+        self.record_size = record_size(n)
+        self._count = count
+        self._index_offset = index_offset
+
+    def __len__(self):
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def records_buffer(self):
+        """
+        Returns a read-only memoryview of all records back to back, record k
+        at k * record_size; see record_fields() for the layout of one record.
+
+        The view shares the mapping, so release it (and anything built on it)
+        before closing the bank.
+        """
+        return memoryview(self._map)[HEADER_SIZE:HEADER_SIZE + self._count * self.record_size]
+
+    def counts(self, k):
+        """
+        Returns (clues, relations) of record k.
+        """
+        return _COUNTS.unpack_from(self._map, self._offset(k))
+
+    def _offset(self, k):
+        if not 0 <= k < self._count:
+            raise IndexError("puzzle index out of range")
+        return HEADER_SIZE + k * self.record_size
+
+    def read(self, k):
+        """
+        Decodes record k into (solution, known_cells, h_rel, v_rel).
+        """
+        n = self.n
+        cells = (n * n + 7) // 8
+        edges = (2 * 2 * n * (n - 1) + 7) // 8
+        offset = self._offset(k) + _COUNTS.size
+        solution_bits = int.from_bytes(self._map[offset:offset + cells], "little")
+        offset += cells
+        given_bits = int.from_bytes(self._map[offset:offset + cells], "little")
+        offset += cells
+        edge_bits = int.from_bytes(self._map[offset:offset + edges], "little")
+        solution = [[solution_bits >> (r * n + c) & 1 for c in range(n)] for r in range(n)]
+        known_cells = [(r, c, solution[r][c]) for r in range(n) for c in range(n)
+                       if given_bits >> (r * n + c) & 1]
+        h_count = n * (n - 1)
+        h_rel = bytearray(edge_bits >> (2 * i) & 3 for i in range(h_count))
+        v_rel = bytearray(edge_bits >> (2 * (h_count + i)) & 3 for i in range(h_count))
+        return solution, known_cells, h_rel, v_rel
+
+    def _index_key(self, i):
+        clues, relations, _ = _INDEX_ENTRY.unpack_from(self._map, self._index_offset + i * _INDEX_ENTRY.size)
+        return clues, relations
+
+    def _lower_bound(self, key):
+        low, high = 0, self._count
+        while low < high:
+            mid = (low + high) // 2
+            if self._index_key(mid) < key:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def select(self, clues, relations):
+        """
+        Returns the record numbers with exactly this clue and relation count.
+        """
+        found = []
+        i = self._lower_bound((clues, relations))
+        while i < self._count:
+            entry_clues, entry_relations, k = _INDEX_ENTRY.unpack_from(
+                self._map, self._index_offset + i * _INDEX_ENTRY.size)
+            if (entry_clues, entry_relations) != (clues, relations):
+                break
+            found.append(k)
+            i += 1
+        return found
+
+    def keys(self):
+        """
+        Returns the distinct (clues, relations) pairs with their record counts.
+        """
+        summary = {}
+        for i in range(self._count):
+            key = self._index_key(i)
+            summary[key] = summary.get(key, 0) + 1
+        return summary
+
+class PuzzleBankWriter:
+    """
+    Appends boards to a puzzle bank, creating the file if needed.
+
+    Records are only ever appended; the index and header are rewritten on
+    close(), so use the writer as a context manager. Until then the header
+    carries FLAG_OPEN and readers refuse the file. Opening a writer on a bank
+    left with FLAG_OPEN rebuilds its index from the records first.
+    """
+    def __init__(self, path, n, adjacency_limit):
+        self.path = path
+        self.n = n
+        self.adjacency_limit = adjacency_limit
+        self.record_size = record_size(n)
+        self._index = []
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self._file = open(path, "r+b")
+            try:
+                self._load(path, n, adjacency_limit)
+            except ValueError:
+                self._file.close()
+                raise
+        else:
+            self._file = open(path, "w+b")
+        self._count = len(self._index)
+        # Flag the header before the old index is overwritten.
+        self._write_header(FLAG_OPEN, 0)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        # New records go right after the existing ones. Dropping the old index
+        # keeps its bytes from passing for records if this writer is interrupted.
+        self._file.truncate(HEADER_SIZE + self._count * self.record_size)
+        self._file.seek(HEADER_SIZE + self._count * self.record_size)
+
+    def _load(self, path, n, adjacency_limit):
+        # Reads the header and the index only; records are scanned just when
+        # an interrupted writer left no index to trust.
+        bank_n, bank_limit, flags, count, index_offset = _read_header(self._file.read(HEADER_SIZE), path)
+        if (bank_n, bank_limit) != (n, adjacency_limit):
+            raise ValueError(f"{path} holds n={bank_n}, adjacency_limit={bank_limit} boards")
+        if not flags & FLAG_OPEN:
+            self._file.seek(index_offset)
+            index = self._file.read(count * _INDEX_ENTRY.size)
+            if len(index) != count * _INDEX_ENTRY.size:
+                raise ValueError(f"{path} has a truncated index")
+            self._index = list(_INDEX_ENTRY.iter_unpack(index))
+            return
+        # Interrupted writer: keep the intact records up to the first torn one.
+        k = 0
+        while True:
+            record = self._file.read(self.record_size)
+            if len(record) < self.record_size or not _record_intact(n, record):
+                break
+            clues, relations = _COUNTS.unpack_from(record, 0)
+            self._index.append((clues, relations, k))
+            k += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def append(self, board):
+        """
+        Appends a TangoBoard (its solution, givens and relations); returns its record number.
+        """
+        if board.n != self.n or board.valid_num != self.adjacency_limit:
+            raise ValueError("Board does not match the bank's n and adjacency limit")
+        if board.solution is None:
+            raise ValueError("Board has no solution to store; solve it first")
+        record = _pack_record(self.n, board.solution, board.known_cells, board._h_rel, board._v_rel)
+        clues, relations = _COUNTS.unpack_from(record, 0)
+        self._file.write(record)
+        k = self._count
+        self._index.append((clues, relations, k))
+        self._count += 1
+        return k
+
+    def _write_header(self, flags, index_offset):
+        self._file.seek(0)
+        self._file.write(_HEADER.pack(MAGIC, VERSION, self.n, self.adjacency_limit, flags,
+                                      self.record_size, self._count, index_offset, 0))
+
+    def close(self):
+        if self._file.closed:
+            return
+        index_offset = HEADER_SIZE + self._count * self.record_size
+        self._file.seek(index_offset)
+        for entry in sorted(self._index):
+            self._file.write(_INDEX_ENTRY.pack(*entry))
+        self._file.truncate()
+        # Records and index must be on disk before the header vouches for them.
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._write_header(0, index_offset)
+        self._file.close()
@@ -0,0 +1,112 @@
+"""
+Vectorized validation of many boards at once with NumPy.
+
+Boards are a (B, n, n) int8 array holding -1 (empty), 0 (M) or 1 (S).
+Relations use the same edge codes as TangoBoard (0 none, 1 '=', 2 '×'):
+h_rel is (B, n, n - 1) and links (r, c) to (r, c + 1), v_rel is
+(B, n - 1, n) and links (r, c) to (r + 1, c). Either may also be given
+without the batch axis to share one layout across all boards.
+
+    cells, h_rel, v_rel = stack_boards(boards)
+    valid, codes = validate_batch(cells, h_rel, v_rel, adjacency_limit=2, with_codes=True)
+
+validate_batch applies the rules of TangoBoard.is_valid_board(): no line
+holds more than half of one symbol, no run is longer than the adjacency
+limit and no relation between two filled cells is broken.
+"""
+import numpy as np
+
+from tango_bank import record_fields
+
+# Violation flags returned per board when with_codes=True.
+BALANCE = 1
+RUN = 2
+RELATION = 4
+EMPTY = 8
+
+def stack_boards(boards):
+    """
+    Packs TangoBoard objects of one size into (cells, h_rel, v_rel) arrays.
+    """
+    n = boards[0].n
+    cells = np.empty((len(boards), n, n), dtype=np.int8)
+    h_rel = np.empty((len(boards), n, n - 1), dtype=np.int8)
+    v_rel = np.empty((len(boards), n - 1, n), dtype=np.int8)
+    for i, board in enumerate(boards):
+        if board.n != n:
+            raise ValueError("All boards in a batch must have the same size")
+        cells[i] = board.board
+        h_rel[i] = np.frombuffer(bytes(board._h_rel), dtype=np.int8).reshape(n, n - 1)
+        v_rel[i] = np.frombuffer(bytes(board._v_rel), dtype=np.int8).reshape(n - 1, n)
+    return cells, h_rel, v_rel
+
+def bank_arrays(bank):
+    """
+    Decodes every record of an open tango_bank.PuzzleBank in one pass.
+
+    Returns (solutions, givens, h_rel, v_rel): solutions as (B, n, n) int8,
+    givens as a (B, n, n) bool mask and the relation codes as above.
+    """
+    n = bank.n
+    count = len(bank)
+    fields = record_fields(n)
+    with bank.records_buffer() as buffer:
+        records = np.frombuffer(buffer, dtype=np.uint8).reshape(count, bank.record_size)
+        solutions, givens, edge_bits = (
+            np.unpackbits(records[:, start:start + size], axis=1, bitorder="little")
+            for start, size in (fields["solution"], fields["givens"], fields["edges"]))
+        # unpackbits copies; the view is only released once no array maps it.
+        del records
+    edges = n * (n - 1)
+    codes = (edge_bits[:, 0:4 * edges:2] | edge_bits[:, 1:4 * edges:2] << 1).astype(np.int8)
+    return (solutions[:, :n * n].astype(np.int8).reshape(count, n, n),
+            givens[:, :n * n].astype(bool).reshape(count, n, n),
+            codes[:, :edges].reshape(count, n, n - 1),
+            codes[:, edges:].reshape(count, n - 1, n))
+
+def _long_runs(mask, limit, axis):
+    # True where a line holds limit + 1 consecutive True cells along axis.
+    counts = np.cumsum(mask, axis=axis, dtype=np.int16)
+    pad = [(0, 0)] * mask.ndim
+    pad[axis] = (1, 0)
+    counts = np.pad(counts, pad)
+    window = limit + 1
+    size = counts.shape[axis]
+    sums = np.take(counts, range(window, size), axis=axis) - np.take(counts, range(size - window), axis=axis)
+    return (sums == window).any(axis=(1, 2))
+
+def validate_batch(cells, h_rel=None, v_rel=None, adjacency_limit=2, require_full=False, with_codes=False):
+    """
+    Checks a (B, n, n) batch of boards; returns a (B,) bool array of valid boards.
+
+    require_full also rejects boards with empty cells. with_codes returns
+    (valid, codes) where codes ORs BALANCE, RUN, RELATION and EMPTY per board.
+    """
+    cells = np.asarray(cells, dtype=np.int8)
+    if cells.ndim != 3 or cells.shape[1] != cells.shape[2]:
+        raise ValueError("cells must have shape (B, n, n)")
+    batch, n, _ = cells.shape
+    half = n // 2
+    codes = np.zeros(batch, dtype=np.uint8)
+    for value in (0, 1):
+        mask = cells == value
+        over = (mask.sum(axis=2) > half).any(axis=1) | (mask.sum(axis=1) > half).any(axis=1)
+        codes[over] |= BALANCE
+        if adjacency_limit < n:
+            runs = _long_runs(mask, adjacency_limit, 2) | _long_runs(mask, adjacency_limit, 1)
+            codes[runs] |= RUN
+    for rel, first, second in ((h_rel, cells[:, :, :-1], cells[:, :, 1:]),
+                               (v_rel, cells[:, :-1, :], cells[:, 1:, :])):
+        if rel is None:
+            continue
+        rel = np.asarray(rel, dtype=np.int8)
+        filled = (first >= 0) & (second >= 0)
+        same = first == second
+        broken = filled & (((rel == 1) & ~same) | ((rel == 2) & same))
+        codes[broken.any(axis=(1, 2))] |= RELATION
+    if require_full:
+        codes[(cells < 0).any(axis=(1, 2))] |= EMPTY
+    valid = codes == 0
+    if with_codes:
+        return valid, codes
+    return valid
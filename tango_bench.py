@@ -0,0 +1,194 @@
+"""
+Reproducible benchmarks for board generation, solving and validation.
+
+    python tango_bench.py                          # print a report
+    python tango_bench.py --save-baseline base.json
+    python tango_bench.py --compare base.json      # exit 1 on regressions
+
+Every case is built from fixed seeds, so two runs time the same boards. The
+suite only imports the board engine and never loads tkinter. It also records
+the cold import time of the engine in fresh interpreters.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from tango_core import SolveStats, TangoBoard
+
+SIZES = (6, 8, 10, 12, 14, 16)
+# Adjacency modes offered by the GUI settings window.
+MODES = {
+    'fixed': lambda n: 2,
+    'scaled': lambda n: n // 2,
+}
+# The row-major backtracker is exponential on random puzzles; larger boards
+# only time the propagating solver.
+BACKTRACK_MAX_N = 8
+# Fresh interpreters used to time the engine import.
+IMPORT_RUNS = 5
+# Validation is far below timer resolution, so it is timed in batches.
+VALIDATE_CALLS = 1000
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+def _summary(times, nodes=None):
+    result = {
+        'median': statistics.median(times),
+        'p95': _percentile(times, 0.95),
+        'runs': len(times),
+    }
+    if nodes is not None:
+        result['nodes_median'] = statistics.median(nodes)
+        result['nodes_p95'] = _percentile(nodes, 0.95)
+    return result
+
+def bench_case(n, adjacency_limit, seeds):
+    """
+    Times every operation on boards of one size and adjacency limit.
+    """
+    clues = n * n // 4
+    relations = n
+    samples = {}
+
+    def record(op, elapsed, nodes=None):
+        times, node_counts = samples.setdefault(op, ([], []))
+        times.append(elapsed)
+        if nodes is not None:
+            node_counts.append(nodes)
+
+    for seed in seeds:
+        board = TangoBoard(n=n, known_cells=clues, relations=relations,
+                           adjacency_limit=adjacency_limit, seed=seed)
+        puzzle = [list(row) for row in board.board]
+
+        stats = SolveStats()
+        start = time.perf_counter()
+        board.generate_solution(stats=stats)
+        record('generate_solution', time.perf_counter() - start, stats.nodes)
+
+        start = time.perf_counter()
+        board.make_puzzle_board(clues)
+        record('make_puzzle_board', time.perf_counter() - start)
+
+        for strategy in ('backtrack', 'propagate') if n <= BACKTRACK_MAX_N else ('propagate',):
+            board.board = puzzle
+            stats = SolveStats()
+            start = time.perf_counter()
+            board.solve(strategy=strategy, stats=stats)
+            record(f'solve[{strategy}]', time.perf_counter() - start, stats.nodes)
+
+        board.board = puzzle
+        start = time.perf_counter()
+        for _ in range(VALIDATE_CALLS):
+            board.is_valid_board()
+        record('is_valid_board', (time.perf_counter() - start) / VALIDATE_CALLS)
+
+    return {op: _summary(times, nodes or None) for op, (times, nodes) in samples.items()}
+
+def bench_import(module="tango_core", runs=IMPORT_RUNS):
+    """
+    Times a cold import of module in fresh interpreters with -X importtime.
+    """
+    env = dict(os.environ)
+    # Let the warm-up run write bytecode so the timed runs load it, as a
+    # deployed server would.
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    here = os.path.dirname(os.path.abspath(__file__))
+    times = []
+    for i in range(runs + 1):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                cwd=here, env=env, capture_output=True, text=True, check=True)
+        cumulative_us = None
+        for line in result.stderr.splitlines():
+            fields = [field.strip() for field in line.split("|")]
+            if len(fields) == 3 and fields[2] == module:
+                cumulative_us = int(fields[1])
+        if cumulative_us is None:
+            # Already imported at startup (e.g. a stdlib module) or misspelled.
+            raise RuntimeError(f"-X importtime reported no import of {module}")
+        if i:
+            times.append(cumulative_us / 1e6)
+    return _summary(times)
+
+def run(sizes=SIZES, modes=tuple(MODES), seeds=range(5), progress=None):
+    """
+    Runs the suite and returns {"n=<n>/<mode>": {op: summary}} plus metadata.
+    """
+    results = {}
+    for n in sizes:
+        for mode in modes:
+            key = f"n={n}/{mode}"
+            if progress:
+                progress(key)
+            results[key] = bench_case(n, MODES[mode](n), list(seeds))
+    if progress:
+        progress("import")
+    results["import"] = {"tango_core": bench_import()}
+    return {
+        'python': platform.python_version(),
+        'seeds': list(seeds),
+        'results': results,
+    }
+
+def compare(report, baseline, tolerance=0.25):
+    """
+    Returns a line per case/op whose median or p95 grew by more than tolerance.
+    """
+    regressions = []
+    for key, ops in report['results'].items():
+        for op, summary in ops.items():
+            base = baseline['results'].get(key, {}).get(op)
+            if base is None:
+                continue
+            for stat in ('median', 'p95', 'nodes_median'):
+                if stat in summary and stat in base and base[stat] > 0 \
+                        and summary[stat] > base[stat] * (1 + tolerance):
+                    regressions.append(f"{key} {op} {stat}: {base[stat]:.6g} -> {summary[stat]:.6g}")
+    return regressions
+
+def format_report(report):
+    lines = [f"{'case':<14} {'operation':<18} {'median ms':>10} {'p95 ms':>10} {'nodes':>8}"]
+    for key, ops in report['results'].items():
+        for op, summary in ops.items():
+            nodes = summary.get('nodes_median')
+            lines.append(f"{key:<14} {op:<18} {summary['median'] * 1e3:>10.4f} {summary['p95'] * 1e3:>10.4f} "
+                         f"{'' if nodes is None else format(nodes, 'g'):>8}")
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Tango generation, solving and validation.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="Board sizes to run.")
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES), help="Adjacency modes.")
+    parser.add_argument("--seeds", type=int, default=5, help="Boards per case (seeds 0..N-1).")
+    parser.add_argument("--save-baseline", metavar="PATH", help="Write the report as a JSON baseline.")
+    parser.add_argument("--compare", metavar="PATH", help="Compare against a JSON baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown before a case counts as a regression.")
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, args.modes, range(args.seeds),
+                 progress=lambda key: print(f"running {key}", file=sys.stderr))
+    print(format_report(report))
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
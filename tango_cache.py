@@ -0,0 +1,162 @@
+"""
+Cache of solve results keyed by the canonical puzzle encoding.
+
+    cache = SolveCache(maxsize=4096, path="solves.sqlite")
+    board.solve(cache=cache)        # or cache.solve(board)
+    cache.lookup(board)             # {'solution': grid or None, 'unique': bool}
+
+Keys are TangoBoard.encode(canonical=True), so a puzzle and its rotations,
+reflections and M/S swap share one entry. Only the givens and relations go
+into the key, so a puzzle keeps hitting while it is played. Each entry holds
+the puzzle's solution in the canonical orientation (one bit per cell, S = 1,
+or None when the puzzle has no solution) and whether that solution is
+unique; results are mapped back onto the asking board's orientation.
+
+The in-memory tier is a bounded LRU. With a path, entries are also written
+to an SQLite file and memory misses fall back to it, so results survive
+restarts and can be shared by processes on one host.
+"""
+from collections import OrderedDict
+
+from tango_core import TangoBoard
+
+class SolveCache:
+    def __init__(self, maxsize=1024, path=None):
+        self.maxsize = maxsize
+        self.path = path
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_hits = 0
+        self._db = None
+        if path is not None:
+            import sqlite3
+            self._db = sqlite3.connect(path)
+            self._db.execute("CREATE TABLE IF NOT EXISTS solves "
+                             "(key BLOB PRIMARY KEY, solution BLOB, is_unique INTEGER NOT NULL)")
+            self._db.commit()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def cache_info(self):
+        """
+        Returns the hit, miss, eviction and disk-hit counters and the current size.
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'disk_hits': self.disk_hits,
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+        }
+
+    def clear(self):
+        """
+        Empties the memory tier; the disk tier is left as it is.
+        """
+        self._entries.clear()
+
+    def _get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+        if self._db is not None:
+            row = self._db.execute("SELECT solution, is_unique FROM solves WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                solution = None if row[0] is None else int.from_bytes(row[0], "little")
+                entry = (solution, bool(row[1]))
+                self._remember(key, entry)
+                self.hits += 1
+                self.disk_hits += 1
+                return entry
+        self.misses += 1
+        return None
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _put(self, key, entry, n):
+        self._remember(key, entry)
+        if self._db is not None:
+            solution, unique = entry
+            blob = None if solution is None else solution.to_bytes((n * n + 7) // 8, "little")
+            self._db.execute("INSERT OR REPLACE INTO solves VALUES (?, ?, ?)", (key, blob, int(unique)))
+            self._db.commit()
+
+    def lookup(self, board):
+        """
+        Returns {'solution': grid or None, 'unique': bool} for board's puzzle,
+        or None when it is not cached. Moves played on the board are not
+        considered, and the board is not changed.
+        """
+        key, cell_src, swap = board._canonical_form()
+        entry = self._get(key)
+        if entry is None:
+            return None
+        solution, unique = entry
+        if solution is None:
+            return {'solution': None, 'unique': False}
+        n = board.n
+        grid = [[-1] * n for _ in range(n)]
+        for i, src in enumerate(cell_src):
+            grid[src // n][src % n] = (solution >> i & 1) ^ swap
+        return {'solution': grid, 'unique': unique}
+
+    def solve(self, board, strategy="propagate", stats=None, on_node=None):
+        """
+        Same contract as TangoBoard.solve(), answering from the cache when it can.
+
+        A miss solves the puzzle from its givens alone and records whether
+        the solution is unique. The cached solution is then used when every
+        filled cell on the board agrees with it; a position whose moves
+        contradict it is solved directly and not cached.
+        """
+        key, cell_src, swap = board._canonical_form()
+        entry = self._get(key)
+        n = board.n
+        if entry is None:
+            puzzle = TangoBoard.from_encoding(board.encode())
+            unique = puzzle.count_solutions(limit=2) == 1
+            solution = None
+            if puzzle.solve(strategy, stats, on_node):
+                solution = 0
+                for i, src in enumerate(cell_src):
+                    if puzzle.cell_value(src // n, src % n) ^ swap:
+                        solution |= 1 << i
+            entry = (solution, unique)
+            self._put(key, entry, n)
+        solution = entry[0]
+        if solution is None:
+            # Moves cannot make an unsolvable puzzle solvable.
+            return False
+        grid = [(solution >> i & 1) ^ swap for i in range(n * n)]
+        empty = []
+        for i, src in enumerate(cell_src):
+            value = board.cell_value(src // n, src % n)
+            if value == -1:
+                empty.append((src, grid[i]))
+            elif value != grid[i]:
+                return board.solve(strategy, stats, on_node)
+        for src, value in empty:
+            board._place(src // n, src % n, value)
+        return True
@@ -0,0 +1,361 @@
+"""
+Clause-learning (CDCL) solver for Tango boards, in pure Python.
+
+The rules are encoded as CNF over one variable per cell (true = S):
+
+    runs       no limit + 1 consecutive cells of a line are all S or all M
+    balance    exactly half of every line is S, as two sequential-counter
+               "at most half" constraints, one over the cells and one over
+               their negations
+    relations  '=' and '×' as two binary clauses each
+    givens     unit clauses
+
+The solver uses two watched literals, 1UIP conflict analysis with
+non-chronological backjumping, VSIDS-style variable activity, phase saving
+and Luby restarts. TangoBoard.solve(strategy="cdcl") runs it, and
+write_dimacs() exports the same CNF for offline comparison with other
+solvers.
+"""
+import heapq
+
+from tango_core import _luby
+
+# Conflicts between restarts are RESTART_BASE * luby(i).
+RESTART_BASE = 64
+_DECAY = 1 / 0.95
+
+class CNF:
+    """
+    Clauses over variables 1..num_vars; literal v is "v true", -v "v false".
+    """
+    def __init__(self, num_vars=0):
+        self.num_vars = num_vars
+        self.clauses = []
+
+    def new_var(self):
+        self.num_vars += 1
+        return self.num_vars
+
+    def add(self, *literals):
+        self.clauses.append(list(literals))
+
+    def at_most(self, literals, k):
+        """
+        Adds "at most k of literals are true" with Sinz's sequential counter.
+        """
+        m = len(literals)
+        if k >= m:
+            return
+        if k == 0:
+            for lit in literals:
+                self.add(-lit)
+            return
+        # s[i][j] is true when at least j + 1 of literals[0..i] are true.
+        s = [[self.new_var() for _ in range(k)] for _ in range(m - 1)]
+        self.add(-literals[0], s[0][0])
+        for j in range(1, k):
+            self.add(-s[0][j])
+        for i in range(1, m - 1):
+            self.add(-literals[i], s[i][0])
+            self.add(-s[i - 1][0], s[i][0])
+            for j in range(1, k):
+                self.add(-literals[i], -s[i - 1][j - 1], s[i][j])
+                self.add(-s[i - 1][j], s[i][j])
+            self.add(-literals[i], -s[i - 1][k - 1])
+        self.add(-literals[m - 1], -s[m - 2][k - 1])
+
+def cell_var(n, row, col):
+    return row * n + col + 1
+
+def encode(board):
+    """
+    Returns the CNF of board's rules, relations and filled cells.
+    """
+    n = board.n
+    half = n // 2
+    limit = board.valid_num
+    cnf = CNF(n * n)
+    lines = [[cell_var(n, r, c) for c in range(n)] for r in range(n)] + \
+        [[cell_var(n, r, c) for r in range(n)] for c in range(n)]
+    for line in lines:
+        for start in range(n - limit):
+            window = line[start:start + limit + 1]
+            cnf.add(*window)
+            cnf.add(*(-v for v in window))
+        cnf.at_most(line, half)
+        cnf.at_most([-v for v in line], half)
+    for (r1, c1), (r2, c2) in board.relations:
+        a, b = cell_var(n, r1, c1), cell_var(n, r2, c2)
+        if board.relations[((r1, c1), (r2, c2))] == '=':
+            cnf.add(a, -b)
+            cnf.add(-a, b)
+        else:
+            cnf.add(a, b)
+            cnf.add(-a, -b)
+    for r in range(n):
+        for c in range(n):
+            value = board.cell_value(r, c)
+            if value != -1:
+                v = cell_var(n, r, c)
+                cnf.add(v if value == 1 else -v)
+    return cnf
+
+def write_dimacs(board, out):
+    """
+    Writes board's CNF to the text stream out in DIMACS format.
+    """
+    cnf = encode(board)
+    out.write(f"c tango n={board.n} adjacency_limit={board.valid_num}\n")
+    out.write(f"c cell (r, c) is variable r * {board.n} + c + 1, true = S\n")
+    out.write(f"p cnf {cnf.num_vars} {len(cnf.clauses)}\n")
+    for clause in cnf.clauses:
+        out.write(" ".join(map(str, clause)) + " 0\n")
+
+class CDCLSolver:
+    """
+    Decides a CNF; solve() returns a model (list of bools by variable) or None.
+    """
+    def __init__(self, cnf):
+        self.num_vars = cnf.num_vars
+        size = cnf.num_vars + 1
+        # Variable state: 1 true, -1 false, 0 unassigned.
+        self.assigns = [0] * size
+        self.level = [0] * size
+        self.reason = [None] * size
+        self.activity = [0.0] * size
+        self.phase = [False] * size
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0
+        self.var_inc = 1.0
+        self.clauses = []
+        # watches[2 * v + (lit < 0)] lists the clauses watching literal lit.
+        self.watches = [[] for _ in range(2 * size)]
+        self.heap = [(0.0, v) for v in range(1, size)]
+        self.ok = True
+        self.conflicts = 0
+        self.decisions = 0
+        self.propagations = 0
+        self.max_depth = 0
+        for clause in cnf.clauses:
+            self._add_clause(list(dict.fromkeys(clause)))
+
+    @staticmethod
+    def _index(lit):
+        return 2 * lit if lit > 0 else -2 * lit + 1
+
+    def _value(self, lit):
+        value = self.assigns[abs(lit)]
+        return value if lit > 0 else -value
+
+    def _add_clause(self, clause):
+        if not self.ok:
+            return
+        if any(-lit in clause for lit in clause):
+            return
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            value = self._value(clause[0])
+            if value == -1:
+                self.ok = False
+            elif value == 0:
+                self._assign(clause[0], None)
+                if self._propagate() is not None:
+                    self.ok = False
+        else:
+            self._attach(clause)
+
+    def _attach(self, clause):
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.watches[self._index(clause[0])].append(index)
+        self.watches[self._index(clause[1])].append(index)
+        return index
+
+    def _assign(self, lit, reason):
+        var = abs(lit)
+        self.assigns[var] = 1 if lit > 0 else -1
+        self.level[var] = len(self.trail_lim)
+        self.reason[var] = reason
+        self.trail.append(lit)
+
+    def _propagate(self):
+        """
+        Runs unit propagation; returns a conflicting clause index or None.
+        """
+        assigns = self.assigns
+        clauses = self.clauses
+        watches = self.watches
+        trail = self.trail
+        while self.qhead < len(trail):
+            false_lit = -trail[self.qhead]
+            self.qhead += 1
+            self.propagations += 1
+            watching = watches[self._index(false_lit)]
+            kept = []
+            conflict = None
+            i = 0
+            while i < len(watching):
+                index = watching[i]
+                i += 1
+                clause = clauses[index]
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], false_lit
+                first = clause[0]
+                first_value = assigns[abs(first)] if first > 0 else -assigns[abs(first)]
+                if first_value == 1:
+                    kept.append(index)
+                    continue
+                for k in range(2, len(clause)):
+                    lit = clause[k]
+                    if (assigns[abs(lit)] if lit > 0 else -assigns[abs(lit)]) != -1:
+                        clause[1], clause[k] = lit, false_lit
+                        watches[self._index(lit)].append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if first_value == -1:
+                        conflict = index
+                        kept.extend(watching[i:])
+                        break
+                    self._assign(first, index)
+            watching[:] = kept
+            if conflict is not None:
+                self.qhead = len(trail)
+                return conflict
+        return None
+
+    def _bump(self, var):
+        self.activity[var] += self.var_inc
+        if self.activity[var] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.var_inc *= 1e-100
+            self.heap = [(-self.activity[v], v) for v in range(1, self.num_vars + 1) if not self.assigns[v]]
+            heapq.heapify(self.heap)
+        elif not self.assigns[var]:
+            heapq.heappush(self.heap, (-self.activity[var], var))
+
+    def _analyze(self, conflict):
+        """
+        Returns (learned clause with the asserting literal first, backjump level).
+        """
+        seen = set()
+        learned = [None]
+        pending = 0
+        current = len(self.trail_lim)
+        clause = self.clauses[conflict]
+        index = len(self.trail) - 1
+        lit = None
+        while True:
+            for other in clause if lit is None else clause[1:]:
+                var = abs(other)
+                if var in seen or self.level[var] == 0:
+                    continue
+                seen.add(var)
+                self._bump(var)
+                if self.level[var] == current:
+                    pending += 1
+                else:
+                    learned.append(other)
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            lit = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.clauses[self.reason[abs(lit)]]
+        learned[0] = -lit
+        if len(learned) == 1:
+            return learned, 0
+        # Watch the literal from the deepest remaining level second.
+        deepest = max(range(1, len(learned)), key=lambda i: self.level[abs(learned[i])])
+        learned[1], learned[deepest] = learned[deepest], learned[1]
+        return learned, self.level[abs(learned[1])]
+
+    def _cancel_until(self, level):
+        if len(self.trail_lim) <= level:
+            return
+        start = self.trail_lim[level]
+        for lit in self.trail[start:]:
+            var = abs(lit)
+            self.phase[var] = lit > 0
+            self.assigns[var] = 0
+            self.reason[var] = None
+            heapq.heappush(self.heap, (-self.activity[var], var))
+        del self.trail[start:]
+        del self.trail_lim[level:]
+        self.qhead = start
+
+    def _pick(self):
+        while self.heap:
+            _, var = heapq.heappop(self.heap)
+            if not self.assigns[var]:
+                return var
+        return None
+
+    def solve(self, on_decision=None):
+        if not self.ok or self._propagate() is not None:
+            return None
+        restart = 0
+        budget = RESTART_BASE * _luby(restart)
+        while True:
+            conflict = self._propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                if not self.trail_lim:
+                    return None
+                learned, level = self._analyze(conflict)
+                self._cancel_until(level)
+                if len(learned) == 1:
+                    self._assign(learned[0], None)
+                else:
+                    self._assign(learned[0], self._attach(learned))
+                self.var_inc *= _DECAY
+                budget -= 1
+                continue
+            if budget <= 0:
+                restart += 1
+                budget = RESTART_BASE * _luby(restart)
+                self._cancel_until(0)
+                continue
+            var = self._pick()
+            if var is None:
+                return [False] + [value == 1 for value in self.assigns[1:]]
+            self.decisions += 1
+            self.trail_lim.append(len(self.trail))
+            self.max_depth = max(self.max_depth, len(self.trail_lim))
+            if on_decision is not None:
+                on_decision(len(self.trail_lim))
+            self._assign(var if self.phase[var] else -var, None)
+
+def solve_board(board, stats=None, on_node=None):
+    """
+    Fills board's empty cells from a CDCL model; returns False, leaving the
+    board untouched, when the puzzle has no solution.
+    """
+    if not board.is_valid_board():
+        return False
+    solver = CDCLSolver(encode(board))
+    on_decision = None
+    if stats is not None:
+        def on_decision(depth):
+            stats.nodes += 1
+            stats.depth = depth
+            if depth > stats.max_depth:
+                stats.max_depth = depth
+            if on_node is not None:
+                on_node(stats)
+    model = solver.solve(on_decision)
+    if stats is not None:
+        stats.backtracks += solver.conflicts
+        stats.propagations += solver.propagations
+    if model is None:
+        return False
+    n = board.n
+    for r in range(n):
+        for c in range(n):
+            if board.cell_value(r, c) == -1:
+                board._place(r, c, 1 if model[cell_var(n, r, c)] else 0)
+    return True
@@ -0,0 +1,118 @@
+"""
+Headless command line tools for the Tango board engine.
+
+    python -m tango generate --size 8 --count 1000 --jobs 4 -o boards.jsonl
+    python -m tango count --size 8 --adjacency-limit 2
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+from tango_core import TangoBoard
+
+# Generation settings shared with every pool worker by _init_worker.
+_config = None
+
+def _init_worker(config):
+    global _config
+    _config = config
+
+def _generate_one(index):
+    """
+    Builds board number index and returns it as one JSON line.
+    """
+    # Each board has its own seed, so output does not depend on --jobs or on
+    # which worker picked the board up.
+    seed = f"{_config['seed']}-{index}"
+    if _config['minimal']:
+        board = TangoBoard.minimal_puzzle(n=_config['size'], relations=_config['relations'],
+                                          adjacency_limit=_config['adjacency_limit'],
+                                          target_clues=_config['clues'], seed=seed,
+                                          logic_only=_config['logic_only'])
+    else:
+        board = TangoBoard(n=_config['size'], known_cells=_config['clues'], relations=_config['relations'],
+                           adjacency_limit=_config['adjacency_limit'], seed=seed)
+    record = {'index': index, 'seed': seed}
+    record.update(board.to_dict())
+    record['solution'] = board.solution
+    return json.dumps(record, ensure_ascii=False)
+
+def generate(config, out, jobs=1, chunksize=16):
+    """
+    Writes config['count'] boards to out as JSON lines, in index order.
+    """
+    count = config['count']
+    if jobs <= 1:
+        _init_worker(config)
+        for index in range(count):
+            out.write(_generate_one(index) + "\n")
+        return
+
+    import multiprocessing
+    # Submit work in bounded windows so a 100k-board run keeps only a few
+    # thousand pending results in memory at any time.
+    window = jobs * chunksize * 8
+    with multiprocessing.Pool(jobs, initializer=_init_worker, initargs=(config,)) as pool:
+        for start in range(0, count, window):
+            indices = range(start, min(start + window, count))
+            for line in pool.imap(_generate_one, indices, chunksize):
+                out.write(line + "\n")
+            out.flush()
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m tango", description="Headless Tango board tools.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    gen = commands.add_parser("generate", help="Generate boards as JSON lines.")
+    gen.add_argument("-n", "--size", type=int, default=6, help="Board side length (even).")
+    gen.add_argument("--clues", type=int, default=21,
+                     help="Known cells per board (target clue count with --minimal).")
+    gen.add_argument("--relations", type=int, default=8, help="Relations per board.")
+    gen.add_argument("--adjacency-limit", type=int, default=2, help="Longest allowed run of one symbol.")
+    gen.add_argument("--count", type=int, default=1, help="Number of boards to generate.")
+    gen.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes.")
+    gen.add_argument("--seed", type=int, default=None, help="Base seed; picked at random when omitted.")
+    gen.add_argument("--minimal", action="store_true",
+                     help="Remove clues down to --clues while keeping the solution unique.")
+    gen.add_argument("--logic-only", action="store_true",
+                     help="With --minimal, keep every board solvable without guessing.")
+    gen.add_argument("-o", "--output", default="-", help="Output JSONL file, '-' for stdout.")
+
+    count = commands.add_parser("count", help="Count every valid full grid of one size.")
+    count.add_argument("-n", "--size", type=int, default=6, help="Board side length (even).")
+    count.add_argument("--adjacency-limit", type=int, default=2, help="Longest allowed run of one symbol.")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.size <= 0 or args.size % 2:
+        print("error: --size must be a positive even number", file=sys.stderr)
+        return 2
+    if args.command == "count":
+        import tango_count
+        print(tango_count.count_grids(args.size, args.adjacency_limit))
+        return 0
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    if args.seed is None:
+        print(f"seed: {seed}", file=sys.stderr)
+    config = {
+        'size': args.size,
+        'clues': args.clues,
+        'relations': args.relations,
+        'adjacency_limit': args.adjacency_limit,
+        'count': args.count,
+        'seed': seed,
+        'minimal': args.minimal,
+        'logic_only': args.logic_only,
+    }
+    if args.output == "-":
+        generate(config, sys.stdout, jobs=args.jobs)
+    else:
+        with open(args.output, "w", encoding="utf-8") as out:
+            generate(config, out, jobs=args.jobs)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,2156 @@
+"""
+Tango board engine: generation, solving, validation and (de)serialization.
+
+This module has no GUI dependencies; tango.py adds the tkinter front end on
+top of it and re-exports the engine API.
+"""
+import copy
+import random
+import time
+import functools
+import itertools
+import math
+from collections.abc import MutableMapping
+
+# json is imported inside the few methods that (de)serialize boards: it was
+# most of this module's cold import time, and solvers never need it.
+
+def has_positive_integer_sqrt_binary_search(num):
+    """
+    Checks if an integer has a positive integer square root using binary search.
+    """
+    if num < 0:
+        return False
+    if num == 0:
+        return True
+    low = 1
+    high = num
+    while low <= high:
+        mid = (low + high) // 2
+        square = mid * mid
+        if square == num:
+            return True
+        elif square < num:
+            low = mid + 1
+        else:
+            high = mid - 1
+    return False
+
+try:
+    _popcount = int.bit_count
+except AttributeError:  # Python < 3.10
+    def _popcount(x):
+        return bin(x).count("1")
+
+_RUN_TABLES = {}
+
+def _run_table(limit):
+    """
+    Returns a lookup table telling, for every (2 * limit + 1)-bit window
+    centred on a cell, whether setting the centre bit keeps runs within limit.
+    """
+    table = _RUN_TABLES.get(limit)
+    if table is None:
+        table = _RUN_TABLES[limit] = tuple(
+            _runs_ok(window | (1 << limit), limit) for window in range(1 << (2 * limit + 1)))
+    return table
+
+def _run_ok(mask, pos, limit):
+    """
+    Checks that setting bit pos in mask leaves no run longer than limit.
+
+    Only the window of limit cells on either side of pos is examined, so any
+    run of limit + 1 set bits found there must pass through pos.
+    """
+    if pos >= limit:
+        window = mask >> (pos - limit)
+    else:
+        window = mask << (limit - pos)
+    if limit <= 6:
+        table = _RUN_TABLES.get(limit) or _run_table(limit)
+        return table[window & ((1 << (2 * limit + 1)) - 1)]
+    window = (window & ((1 << (2 * limit + 1)) - 1)) | (1 << limit)
+    for _ in range(limit):
+        window &= window >> 1
+    return not window
+
+def _runs_ok(mask, limit):
+    """
+    Checks that mask contains no run of set bits longer than limit.
+    """
+    for _ in range(limit):
+        mask &= mask >> 1
+    return not mask
+
+def legal_row_patterns(n, limit):
+    """
+    Returns every legal row for (n, limit) as a mask of the columns holding S.
+
+    A legal row is balanced and has no run longer than limit. Patterns come in
+    lexicographic order of the row read left to right with M before S.
+    """
+    return _row_pattern_table(n, limit).patterns
+
+class _RowPatterns:
+    """
+    Legal row patterns for one (n, limit) plus per-column membership bitsets.
+
+    Bit i of with_one[c] is set when pattern i has S in column c, so the rows
+    compatible with a set of forbidden columns is a handful of big-int ANDs.
+    """
+    def __init__(self, n, limit):
+        half = n // 2
+        patterns = []
+
+        def extend(col, mask, ones, run, last):
+            if col == n:
+                patterns.append(mask)
+                return
+            for bit in (0, 1):
+                count = ones + bit
+                if count > half or col + 1 - count > half:
+                    continue
+                length = run + 1 if bit == last else 1
+                if length > limit:
+                    continue
+                extend(col + 1, mask | (bit << col), count, length, bit)
+
+        extend(0, 0, 0, 0, -1)
+        self.n = n
+        self.limit = limit
+        self.patterns = tuple(patterns)
+        self.all = (1 << len(patterns)) - 1
+        self.with_one = []
+        for col in range(n):
+            members = 0
+            for i, mask in enumerate(patterns):
+                if mask >> col & 1:
+                    members |= 1 << i
+            self.with_one.append(members)
+        self.with_zero = [self.all & ~members for members in self.with_one]
+        # Bit i of differ[c] is set when pattern i changes symbol between c and c + 1.
+        self.differ = [self.with_one[c] ^ self.with_one[c + 1] for c in range(n - 1)]
+
+    def compatible(self, no_one, no_zero):
+        """
+        Returns the bitset of patterns with M in every no_one column and S in every no_zero column.
+        """
+        candidates = self.all
+        while no_one:
+            low = no_one & -no_one
+            no_one ^= low
+            candidates &= self.with_zero[low.bit_length() - 1]
+        while no_zero:
+            low = no_zero & -no_zero
+            no_zero ^= low
+            candidates &= self.with_one[low.bit_length() - 1]
+        return candidates
+
+@functools.lru_cache(maxsize=None)
+def _row_pattern_table(n, limit):
+    return _RowPatterns(n, limit)
+
+# Line reasoning uses the pattern table while a line has at most this many
+# legal patterns (up to n = 20 with the fixed limit of 2, n = 16 with the
+# scaled one). The table grows about 2.5x for every two extra columns, so
+# larger lines are analysed state by state with _scan_line instead.
+MAX_ROW_PATTERNS = 1 << 14
+
+@functools.lru_cache(maxsize=None)
+def _pattern_count(remaining, need, last, run, limit):
+    # Like _line_completable, but counts the completions.
+    if need < 0 or need > remaining:
+        return 0
+    if remaining == 0:
+        return 1
+    total = 0
+    for bit in (0, 1):
+        length = run + 1 if bit == last else 1
+        if length <= limit:
+            total += _pattern_count(remaining - 1, need - bit, bit, length, limit)
+    return total
+
+def _pattern_table_or_none(n, limit):
+    """
+    Returns the pattern table for (n, limit), or None when it would hold more
+    than MAX_ROW_PATTERNS patterns.
+    """
+    if _pattern_count(n, n // 2, -1, 0, limit) > MAX_ROW_PATTERNS:
+        return None
+    return _row_pattern_table(n, limit)
+
+def _line_layers(n, limit, no_one, no_zero, same, differ):
+    """
+    Walks the legal patterns of a line as (S count, last symbol, run) states,
+    column by column, without the pattern table.
+
+    The patterns walked have M in every no_one column, S in every no_zero
+    column, equal symbols across every same edge and different ones across
+    every differ edge (bit i links columns i and i + 1). layers[i] maps each
+    state reached after i columns to [paths reaching it, its (bit, next
+    state) moves]; returns None when some column cannot be reached. The cost
+    is O(n * n * limit) rather than one bit per legal pattern. From a limit
+    of n / 2 up no run can break it, so runs are recorded as 0.
+    """
+    half = n // 2
+    layers = [{(0, -1, 0): [1, []]}]
+    for i in range(n):
+        bits = [bit for bit in (0, 1) if not (no_zero, no_one)[bit] >> i & 1]
+        linked = 0
+        if i and same >> (i - 1) & 1:
+            linked = 1
+        elif i and differ >> (i - 1) & 1:
+            linked = 2
+        reached = {}
+        for (ones, last, run), (paths, moves) in layers[i].items():
+            for bit in bits:
+                if linked and (bit == last) != (linked == 1):
+                    continue
+                count = ones + bit
+                if count > half or i + 1 - count > half:
+                    continue
+                length = run + 1 if bit == last else 1
+                if length > limit:
+                    continue
+                nxt = (count, bit, length if limit < half else 0)
+                entry = reached.get(nxt)
+                if entry is None:
+                    entry = reached[nxt] = [0, []]
+                entry[0] += paths
+                moves.append((bit, nxt))
+        if not reached:
+            return None
+        layers.append(reached)
+    return layers
+
+def _scan_line(n, limit, no_one, no_zero, same, differ):
+    """
+    Counts the patterns _line_layers walks: returns (zero_ways, one_ways),
+    where zero_ways[i] of them have M in column i and one_ways[i] have S
+    there, or None when there are none.
+    """
+    layers = _line_layers(n, limit, no_one, no_zero, same, differ)
+    if layers is None:
+        return None
+    # Every state after n columns is balanced: neither count went over half.
+    completions = dict.fromkeys(layers[n], 1)
+    ways = ([0] * n, [0] * n)
+    for i in range(n - 1, -1, -1):
+        below = {}
+        for state, (paths, moves) in layers[i].items():
+            total = 0
+            for bit, nxt in moves:
+                count = completions[nxt]
+                if count:
+                    total += count
+                    ways[bit][i] += paths * count
+            below[state] = total
+        completions = below
+    if not completions[(0, -1, 0)]:
+        return None
+    return ways
+
+def _band_alive(n, limit, options):
+    """
+    Checks which partial fillings of a band of k rows can be completed.
+
+    options[c] lists the k-tuples of symbols column c may take down the
+    band. Returns alive, where alive[c] is the set of states after c columns
+    that some legal filling passes through, or None when there is none. A
+    state holds one _line_layers triple per row of the band.
+    """
+    half = n // 2
+    layers = [{((0, -1, 0),) * len(options[0]): []}]
+    for c in range(n):
+        reached = {}
+        for state, moves in layers[c].items():
+            for bits in options[c]:
+                nxt = []
+                for (ones, last, run), bit in zip(state, bits):
+                    count = ones + bit
+                    length = run + 1 if bit == last else 1
+                    if count > half or c + 1 - count > half or length > limit:
+                        break
+                    nxt.append((count, bit, length if limit < half else 0))
+                else:
+                    nxt = tuple(nxt)
+                    reached[nxt] = True
+                    moves.append(nxt)
+        if not reached:
+            return None
+        layers.append({state: [] for state in reached})
+    alive = [set(layers[n])]
+    for c in range(n - 1, -1, -1):
+        alive.append({state for state, moves in layers[c].items() if any(nxt in alive[-1] for nxt in moves)})
+    alive.reverse()
+    return alive if alive[0] else None
+
+@functools.lru_cache(maxsize=None)
+def _line_completable(remaining, need, last, run, limit):
+    """
+    Checks whether a line ending in `run` copies of `last` can take `remaining`
+    more cells, exactly `need` of them S, without a run longer than limit.
+    """
+    if need < 0 or need > remaining:
+        return False
+    if remaining == 0:
+        return True
+    for bit in (0, 1):
+        length = run + 1 if bit == last else 1
+        if length <= limit and _line_completable(remaining - 1, need - bit, bit, length, limit):
+            return True
+    return False
+
+@functools.lru_cache(maxsize=None)
+def _symmetry_tables(n):
+    """
+    Returns (cell_src, edge_src) for each of the 8 rotations and reflections
+    of an n x n grid: cell_src[i] is the source cell of destination cell i
+    (row-major) and edge_src[j] the source edge of destination edge j, with
+    horizontal edges first (r * (n - 1) + c) and vertical ones after them
+    (n * (n - 1) + r * n + c).
+    """
+    last = n - 1
+    maps = (
+        lambda r, c: (r, c),
+        lambda r, c: (c, last - r),
+        lambda r, c: (last - r, last - c),
+        lambda r, c: (last - c, r),
+        lambda r, c: (r, last - c),
+        lambda r, c: (last - r, c),
+        lambda r, c: (c, r),
+        lambda r, c: (last - c, last - r),
+    )
+    h_count = n * (n - 1)
+
+    def edge_index(a, b):
+        (r1, c1), (r2, c2) = sorted((a, b))
+        if r1 == r2:
+            return r1 * (n - 1) + c1
+        return h_count + r1 * n + c1
+
+    tables = []
+    for move in maps:
+        cell_src = [0] * (n * n)
+        for r in range(n):
+            for c in range(n):
+                r2, c2 = move(r, c)
+                cell_src[r2 * n + c2] = r * n + c
+        edge_src = [0] * (2 * h_count)
+        for r in range(n):
+            for c in range(n):
+                for r2, c2 in ((r, c + 1), (r + 1, c)):
+                    if r2 < n and c2 < n:
+                        edge_src[edge_index(move(r, c), move(r2, c2))] = edge_index((r, c), (r2, c2))
+        tables.append((cell_src, edge_src))
+    return tuple(tables)
+
+def _pack_codes(codes):
+    # Packs 2-bit codes into little-endian bytes, four to a byte.
+    value = 0
+    for i, code in enumerate(codes):
+        if code:
+            value |= code << (2 * i)
+    return value.to_bytes((2 * len(codes) + 7) // 8, "little")
+
+class _RowView:
+    """
+    List-like view of one board row backed by the TangoBoard bitmasks.
+    """
+    def __init__(self, owner, row):
+        self._owner = owner
+        self._row = row
+
+    def __len__(self):
+        return self._owner.n
+
+    def __getitem__(self, col):
+        if isinstance(col, slice):
+            return [self._owner.cell_value(self._row, c) for c in range(self._owner.n)[col]]
+        if col < 0:
+            col += self._owner.n
+        if not 0 <= col < self._owner.n:
+            raise IndexError("column index out of range")
+        return self._owner.cell_value(self._row, col)
+
+    def __setitem__(self, col, value):
+        if col < 0:
+            col += self._owner.n
+        if not 0 <= col < self._owner.n:
+            raise IndexError("column index out of range")
+        self._owner.set_cell(self._row, col, value)
+
+    def __iter__(self):
+        for c in range(self._owner.n):
+            yield self._owner.cell_value(self._row, c)
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
+
+class _BoardView:
+    """
+    List-of-lists view of a TangoBoard, so board[r][c] reads and writes cells.
+    """
+    def __init__(self, owner):
+        self._owner = owner
+
+    def __len__(self):
+        return self._owner.n
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [_RowView(self._owner, r) for r in range(self._owner.n)[row]]
+        if row < 0:
+            row += self._owner.n
+        if not 0 <= row < self._owner.n:
+            raise IndexError("row index out of range")
+        return _RowView(self._owner, row)
+
+    def __iter__(self):
+        for r in range(self._owner.n):
+            yield _RowView(self._owner, r)
+
+    def __eq__(self, other):
+        return [list(row) for row in self] == [list(row) for row in other]
+
+    def __repr__(self):
+        return repr([list(row) for row in self])
+
+# Relation codes stored in the edge arrays; 0 means no relation.
+_REL_CODES = {'=': 1, '×': 2}
+_REL_SYMBOLS = (None, '=', '×')
+# Display text by cell value; index -1 is an empty cell.
+_CELL_SYMBOLS = ("M", "S", "")
+
+# Human deduction rules used by TangoBoard.grade(), easiest first:
+#   balance   a line already holds half of one symbol, so its gaps take the other
+#   pair      a symbol would extend a run past the adjacency limit
+#   relation  '=' / '×' with a filled neighbour, or with an empty neighbour
+#             that already cannot take one of the symbols
+#   line      every legal arrangement of a row or column agrees on the cell
+LOGIC_TIERS = ('balance', 'pair', 'relation', 'line')
+_TIER_DIFFICULTY = {'balance': 'easy', 'pair': 'easy', 'relation': 'medium', 'line': 'hard'}
+
+class _RelationView(MutableMapping):
+    """
+    Dict-style view of the relation edge arrays keyed by ((r1, c1), (r2, c2)).
+    """
+    def __init__(self, owner):
+        self._owner = owner
+
+    def _slot(self, key):
+        # Maps a pair of adjacent cells to (edge array, index).
+        (r1, c1), (r2, c2) = key
+        if (r2, c2) < (r1, c1):
+            r1, c1, r2, c2 = r2, c2, r1, c1
+        n = self._owner.n
+        if not (0 <= r1 < n and 0 <= c1 < n and 0 <= r2 < n and 0 <= c2 < n):
+            raise KeyError(key)
+        if r1 == r2 and c2 == c1 + 1:
+            return self._owner._h_rel, r1 * (n - 1) + c1
+        if c1 == c2 and r2 == r1 + 1:
+            return self._owner._v_rel, r1 * n + c1
+        raise KeyError(key)
+
+    def __getitem__(self, key):
+        edges, index = self._slot(key)
+        code = edges[index]
+        if not code:
+            raise KeyError(key)
+        return _REL_SYMBOLS[code]
+
+    def __setitem__(self, key, rel):
+        if rel not in _REL_CODES:
+            raise ValueError(f"Unknown relation: {rel}")
+        edges, index = self._slot(key)
+        edges[index] = _REL_CODES[rel]
+        self._owner._relation_version += 1
+        self._owner._check_edge(edges is self._owner._v_rel, index)
+
+    def __delitem__(self, key):
+        edges, index = self._slot(key)
+        if not edges[index]:
+            raise KeyError(key)
+        edges[index] = 0
+        self._owner._relation_version += 1
+        self._owner._check_edge(edges is self._owner._v_rel, index)
+
+    def __iter__(self):
+        n = self._owner.n
+        h_rel, v_rel = self._owner._h_rel, self._owner._v_rel
+        for r in range(n):
+            for c in range(n):
+                if c < n - 1 and h_rel[r * (n - 1) + c]:
+                    yield ((r, c), (r, c + 1))
+                if r < n - 1 and v_rel[r * n + c]:
+                    yield ((r, c), (r + 1, c))
+
+    def __len__(self):
+        return len(self._owner._h_rel) - self._owner._h_rel.count(0) + \
+            len(self._owner._v_rel) - self._owner._v_rel.count(0)
+
+    def copy(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        return repr(self.copy())
+
+class SolveStats:
+    """
+    Search counters filled in by solve() and generate_solution().
+
+    Pass the same object to several calls to accumulate totals. nodes counts
+    branching decisions (a cell, or a whole row during generation),
+    backtracks counts decisions that were undone, and propagations counts
+    cells forced by relations or line deductions. depth is the current
+    number of decisions on the search path while a call is running.
+    restarts counts how often randomized generation gave up on an attempt
+    and started over.
+    """
+    def __init__(self):
+        self.nodes = 0
+        self.backtracks = 0
+        self.propagations = 0
+        self.restarts = 0
+        self.depth = 0
+        self.max_depth = 0
+        self.wall_time = 0.0
+
+    def as_dict(self):
+        return {
+            'nodes': self.nodes,
+            'backtracks': self.backtracks,
+            'propagations': self.propagations,
+            'restarts': self.restarts,
+            'max_depth': self.max_depth,
+            'wall_time': self.wall_time,
+        }
+
+    def __repr__(self):
+        return "SolveStats(" + ", ".join(f"{k}={v!r}" for k, v in self.as_dict().items()) + ")"
+
+# Randomized generation restarts after RESTART_BASE * n * luby(i) rows on
+# attempt i, or RESTART_BASE * n * n * luby(i) cells on boards too large for
+# the row-pattern table.
+RESTART_BASE = 2
+
+def _luby(i):
+    """
+    Returns term i (from 0) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, 1, ...
+    """
+    size, power = 1, 0
+    while size < i + 1:
+        power += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) >> 1
+        power -= 1
+        i %= size
+    return 1 << power
+
+def _enter_node(stats, on_node, depth):
+    # Only reached with instrumentation on; the solvers test stats for None
+    # once per node so the uninstrumented paths pay nothing else.
+    stats.nodes += 1
+    stats.depth = depth
+    if depth > stats.max_depth:
+        stats.max_depth = depth
+    if on_node is not None:
+        on_node(stats)
+
+class TangoBoard:
+    def __init__(self, n=6, known_cells=21, relations=8, adjacency_limit=2, seed=None):
+        # Refactorized code, generate a filled board first then empty it.
+        if not has_positive_integer_sqrt_binary_search(n * n):
+            raise ValueError("Board size must be a perfect square.")
+        if n % 2 != 0:
+            raise ValueError("Board side length must be even")
+        # A seed gives the board its own generator so runs are reproducible;
+        # without one the shared module generator is used as before.
+        self._rng = random if seed is None else random.Random(seed)
+        self.valid_num = adjacency_limit  # Configurable adjacency limit
+        self._reset_state(n)
+        self.known_cells_count = known_cells
+        self.relations_count = relations
+        self.solution = self.generate_solution()
+        self.relations = self.create_relations_from_solution(relations)
+        board, _, _, self.known_cells = self.make_puzzle_board(known_cells)
+        self.board = board
+
+    def _reset_state(self, n):
+        # Core state is one bitmask per symbol for every row and every column:
+        # bit c of _row_bits[v][r] is set when cell (r, c) holds v, and bit r
+        # of _col_bits[v][c] mirrors it. Counts and runs are mask arithmetic.
+        self.n = n
+        self.length = n
+        self.size = n * n
+        self._row_bits = [[0] * n, [0] * n]
+        self._col_bits = [[0] * n, [0] * n]
+        # Relations live in two edge arrays: _h_rel[r * (n - 1) + c] links
+        # (r, c) to (r, c + 1) and _v_rel[r * n + c] links (r, c) to (r + 1, c).
+        self._h_rel = bytearray(n * (n - 1))
+        self._v_rel = bytearray((n - 1) * n)
+        # Bumped by every relation edit, so caches of the edges can tell they
+        # are stale by comparing one integer.
+        self._relation_version = 0
+        self._edge_cache = None
+        self._clear_conflicts()
+        # Hint cache, rebuilt on first use; see _sync_hints.
+        self._hint_seen = None
+
+    def _clear_conflicts(self):
+        # Live rule violations, kept up to date by _place/_unplace and relation
+        # edits: (line, value) pairs over half, (line, value, start) windows of
+        # valid_num + 1 equal symbols, and (vertical, index) broken relation
+        # edges. Lines are rows 0..n-1 and columns n..2n-1.
+        self._overflow = set()
+        self._bad_runs = set()
+        self._broken = set()
+
+    @property
+    def relations(self):
+        return _RelationView(self)
+
+    @relations.setter
+    def relations(self, relations):
+        items = list(relations.items())
+        self._h_rel = bytearray(self.n * (self.n - 1))
+        self._v_rel = bytearray((self.n - 1) * self.n)
+        self._relation_version += 1
+        self._broken = set()
+        view = _RelationView(self)
+        for key, rel in items:
+            view[key] = rel
+
+    def _related(self, row, col):
+        """
+        Returns the (row, col, rel) neighbours related to a cell in O(1).
+        """
+        n = self.n
+        related = []
+        if col > 0:
+            code = self._h_rel[row * (n - 1) + col - 1]
+            if code:
+                related.append((row, col - 1, _REL_SYMBOLS[code]))
+        if col < n - 1:
+            code = self._h_rel[row * (n - 1) + col]
+            if code:
+                related.append((row, col + 1, _REL_SYMBOLS[code]))
+        if row > 0:
+            code = self._v_rel[(row - 1) * n + col]
+            if code:
+                related.append((row - 1, col, _REL_SYMBOLS[code]))
+        if row < n - 1:
+            code = self._v_rel[row * n + col]
+            if code:
+                related.append((row + 1, col, _REL_SYMBOLS[code]))
+        return related
+
+    @property
+    def board(self):
+        return _BoardView(self)
+
+    @board.setter
+    def board(self, cells):
+        # cells may be a live view of this board, so copy it before clearing.
+        cells = [list(row) for row in cells]
+        n = self.n
+        self._row_bits = [[0] * n, [0] * n]
+        self._col_bits = [[0] * n, [0] * n]
+        self._overflow = set()
+        self._bad_runs = set()
+        self._broken = set()
+        for r, row in enumerate(cells):
+            for c, value in enumerate(row):
+                if value != -1:
+                    self._place(r, c, value)
+
+    @property
+    def row_counts(self):
+        zeros, ones = self._row_bits
+        return [[_popcount(zeros[r]), _popcount(ones[r])] for r in range(self.n)]
+
+    @property
+    def col_counts(self):
+        zeros, ones = self._col_bits
+        return [[_popcount(zeros[c]), _popcount(ones[c])] for c in range(self.n)]
+
+    def cell_value(self, row, col):
+        """
+        Returns 0 (M), 1 (S) or -1 (empty) for the given cell.
+        """
+        if self._row_bits[0][row] >> col & 1:
+            return 0
+        if self._row_bits[1][row] >> col & 1:
+            return 1
+        return -1
+
+    def set_cell(self, row, col, value):
+        """
+        Writes value (0, 1 or -1 to clear) into a cell without rule checks.
+        """
+        current = self.cell_value(row, col)
+        if current != -1:
+            self._unplace(row, col, current)
+        if value != -1:
+            self._place(row, col, value)
+
+    def _place(self, row, col, value):
+        row_mask = self._row_bits[value][row]
+        col_mask = self._col_bits[value][col]
+        self._row_bits[value][row] = row_mask | (1 << col)
+        self._col_bits[value][col] = col_mask | (1 << row)
+        # Placing can only create conflicts, and only around this cell; the
+        # common legal placement costs two popcounts and two table lookups.
+        n = self.n
+        limit = self.valid_num
+        for line, mask, pos in ((row, row_mask, col), (n + col, col_mask, row)):
+            if _popcount(mask) >= n // 2:
+                self._overflow.add((line, value))
+            if not _run_ok(mask, pos, limit):
+                mask |= 1 << pos
+                window = (1 << (limit + 1)) - 1
+                for start in range(max(0, pos - limit), min(pos, n - limit - 1) + 1):
+                    if (mask >> start) & window == window:
+                        self._bad_runs.add((line, value, start))
+        for r, c, rel in self._related(row, col):
+            other = self.cell_value(r, c)
+            if other != -1 and (other == value) != (rel == '='):
+                if r == row:
+                    self._broken.add((False, row * (n - 1) + min(c, col)))
+                else:
+                    self._broken.add((True, min(r, row) * n + col))
+
+    def _unplace(self, row, col, value):
+        self._row_bits[value][row] &= ~(1 << col)
+        self._col_bits[value][col] &= ~(1 << row)
+        # Clearing a cell can only resolve conflicts it was part of.
+        n = self.n
+        if self._overflow:
+            for line, mask in ((row, self._row_bits[value][row]), (n + col, self._col_bits[value][col])):
+                if _popcount(mask) <= n // 2:
+                    self._overflow.discard((line, value))
+        if self._bad_runs:
+            limit = self.valid_num
+            for line, pos in ((row, col), (n + col, row)):
+                for start in range(max(0, pos - limit), min(pos, n - limit - 1) + 1):
+                    self._bad_runs.discard((line, value, start))
+        if self._broken:
+            if col > 0:
+                self._broken.discard((False, row * (n - 1) + col - 1))
+            if col < n - 1:
+                self._broken.discard((False, row * (n - 1) + col))
+            if row > 0:
+                self._broken.discard((True, (row - 1) * n + col))
+            if row < n - 1:
+                self._broken.discard((True, row * n + col))
+
+    def _check_edge(self, vertical, index):
+        if vertical:
+            code = self._v_rel[index]
+            r1, c1 = divmod(index, self.n)
+            r2, c2 = r1 + 1, c1
+        else:
+            code = self._h_rel[index]
+            r1, c1 = divmod(index, self.n - 1)
+            r2, c2 = r1, c1 + 1
+        a = self.cell_value(r1, c1)
+        b = self.cell_value(r2, c2)
+        if code and a != -1 and b != -1 and (a == b) != (code == _REL_CODES['=']):
+            self._broken.add((vertical, index))
+        else:
+            self._broken.discard((vertical, index))
+
+    def _fits(self, row_bits, col_bits, row, col, value):
+        # Balance and run-length test for value at (row, col) against masks.
+        half = self.n // 2
+        row_mask = row_bits[value][row]
+        col_mask = col_bits[value][col]
+        return _popcount(row_mask) < half and _popcount(col_mask) < half \
+            and _run_ok(row_mask, col, self.valid_num) and _run_ok(col_mask, row, self.valid_num)
+
+    def can_place(self, row, col, value):
+        """
+        Checks row/column balance and the adjacency limit for value at (row, col).
+        """
+        return self._fits(self._row_bits, self._col_bits, row, col, value)
+
+    def generate_solution(self, stats=None, on_node=None, randomize=True, uniform=False):
+        # Return a completely filled, valid n × n board, built a row at a time
+        # from the cached legal row patterns. With randomize, patterns are
+        # drawn from self._rng, so a seeded board always gets the same grid,
+        # and the search restarts whenever it exceeds a node budget that
+        # follows the Luby sequence; random orders are otherwise prone to
+        # very long backtracking runs. Without it, patterns are tried in
+        # lexicographic order, which gives the grid the cell-wise search
+        # finds first. stats (a SolveStats) and on_node(stats) instrument the
+        # search; every row tried is one node. Boards too large for the
+        # pattern table (see MAX_ROW_PATTERNS) are filled a cell at a time in
+        # row-major order instead, with the same randomization and restarts;
+        # there every cell tried is one node. With uniform, the grid is drawn
+        # uniformly from every valid grid by tango_count instead; sizes
+        # outside tango_count.practical() raise ValueError.
+        if uniform:
+            import tango_count
+            if not tango_count.practical(self.n, self.valid_num):
+                raise ValueError(f"Uniform sampling is out of reach for n={self.n} "
+                                 f"with adjacency limit {self.valid_num}")
+            grid = tango_count.sample_grid(self.n, self.valid_num, self._rng)
+            return grid if grid is not None else [[-1] * self.n for _ in range(self.n)]
+        if on_node is not None and stats is None:
+            stats = SolveStats()
+        start = time.perf_counter() if stats is not None else 0.0
+        n = self.n
+        if _pattern_table_or_none(n, self.valid_num) is None:
+            fill, step = self._fill_cells, RESTART_BASE * n * n
+        else:
+            fill, step = self._fill_rows, RESTART_BASE * n
+        if randomize:
+            attempt = 0
+            while True:
+                rows = fill(self._rng, step * _luby(attempt), stats, on_node)
+                if rows is not None:
+                    break
+                attempt += 1
+                if stats is not None:
+                    stats.restarts += 1
+        else:
+            rows = fill(None, None, stats, on_node)
+        if stats is not None:
+            stats.wall_time += time.perf_counter() - start
+        if len(rows) < n:
+            return [[-1] * n for _ in range(n)]
+        return [[pattern >> c & 1 for c in range(n)] for pattern in rows]
+
+    def _fill_rows(self, rng, budget, stats, on_node):
+        """
+        Searches for n row patterns that also make every column legal.
+
+        Returns the patterns, an empty list when no grid exists, or None when
+        more than budget rows were tried. rng picks among the candidate
+        patterns at random; without it the lowest pattern is tried first.
+        """
+        n = self.n
+        half = n // 2
+        limit = self.valid_num
+        table = _row_pattern_table(n, limit)
+        patterns = table.patterns
+        rows = []
+        # Column states: S count, last symbol and length of the trailing run.
+        ones = [0] * n
+        last = [-1] * n
+        run = [0] * n
+
+        def open_row(r):
+            # A column forbids a symbol when the column could not be completed
+            # after taking it; this covers balance and the adjacency limit.
+            remaining = n - r - 1
+            no_one = no_zero = 0
+            for c in range(n):
+                need = half - ones[c]
+                length = run[c] + 1 if last[c] == 1 else 1
+                if length > limit or not _line_completable(remaining, need - 1, 1, length, limit):
+                    no_one |= 1 << c
+                length = run[c] + 1 if last[c] == 0 else 1
+                if length > limit or not _line_completable(remaining, need, 0, length, limit):
+                    no_zero |= 1 << c
+            return [table.compatible(no_one, no_zero), (ones[:], last[:], run[:])]
+
+        # One frame per row on the search path: the patterns still untried
+        # there and the column states to restore before trying the next one.
+        frames = [open_row(0)] if n else []
+        tried = 0
+        while frames and len(rows) < n:
+            frame = frames[-1]
+            r = len(frames) - 1
+            if len(rows) > r:
+                # The pattern tried in this row led nowhere below it.
+                if stats is not None:
+                    stats.backtracks += 1
+                rows.pop()
+                ones[:], last[:], run[:] = frame[1]
+            candidates = frame[0]
+            if not candidates:
+                frames.pop()
+                continue
+            if budget is not None and tried == budget:
+                return None
+            tried += 1
+            if rng is None:
+                low = candidates & -candidates
+            else:
+                # The first candidate at or after a random pattern index,
+                # wrapping around to the lowest one.
+                shift = rng.randrange(len(patterns))
+                higher = candidates >> shift
+                low = (higher & -higher) << shift if higher else candidates & -candidates
+            frame[0] = candidates ^ low
+            pattern = patterns[low.bit_length() - 1]
+            if stats is not None:
+                _enter_node(stats, on_node, r + 1)
+            rows.append(pattern)
+            for c in range(n):
+                bit = pattern >> c & 1
+                ones[c] += bit
+                run[c] = run[c] + 1 if last[c] == bit else 1
+                last[c] = bit
+            if r + 1 < n:
+                frames.append(open_row(r + 1))
+        return rows
+
+    def _fill_cells(self, rng, budget, stats, on_node):
+        """
+        Fills a blank grid cell by cell in row-major order.
+
+        Same contract as _fill_rows: returns the S mask of every row, an empty
+        list when no grid exists, or None when more than budget cells were
+        tried. The grid lives in local masks, so the board is not touched.
+        """
+        n = self.n
+        half = n // 2
+        limit = self.valid_num
+        size = n * n
+        row_bits = [[0] * n, [0] * n]
+        col_bits = [[0] * n, [0] * n]
+        # bands[r][c] holds the _line_layers states after c cells of row r
+        # that some legal filling of row r passes through, given what every
+        # column allows there; set on entering the row, None when no row fits.
+        # Within three rows of the bottom the filling covers every row left,
+        # since the column counts leave those rows little choice and random
+        # fills otherwise dead-end there.
+        bands = [None] * n
+
+        def run_after(mask, pos):
+            # Length of the run that taking the symbol of mask at pos ends.
+            run = 1
+            while run <= pos and mask >> (pos - run) & 1:
+                run += 1
+            return run
+
+        def enter(row):
+            depth = n - row if n - row <= 3 else 1
+            options = []
+            for c in range(n):
+                column = []
+                for bits in itertools.product((0, 1), repeat=depth):
+                    masks = [col_bits[0][c], col_bits[1][c]]
+                    left = half - _popcount(masks[1])
+                    for i, v in enumerate(bits):
+                        left -= v
+                        run = run_after(masks[v], row + i)
+                        # Balance and adjacency for the rest of the column.
+                        if run > limit or not _line_completable(n - row - i - 1, left, v, run, limit):
+                            break
+                        masks[v] |= 1 << (row + i)
+                    else:
+                        column.append(bits)
+                options.append(column)
+            alive = _band_alive(n, limit, options)
+            # Only row r's own part of each state can be checked while row r
+            # is filled in.
+            bands[row] = None if alive is None else [{state[0] for state in states} for states in alive]
+
+        def fits(row, col, value):
+            band = bands[row]
+            if band is None or not self._fits(row_bits, col_bits, row, col, value):
+                return False
+            run = run_after(row_bits[value][row], col) if limit < half else 0
+            return (_popcount(row_bits[1][row]) + value, value, run) in band[col + 1]
+
+        def values(pos):
+            # Popped from the end: M first without rng. With it, the symbol
+            # the column is short of comes first more often the further it
+            # lags, which keeps columns near balanced and their last rows
+            # open; an even coin leaves most attempts stuck at the bottom.
+            if rng is None:
+                return [1, 0]
+            row, col = divmod(pos, n)
+            lean = half - _popcount(col_bits[1][col]) - (n - row) / 2
+            return [0, 1] if rng.random() * (1 + math.exp(-3 * lean)) < 1 else [1, 0]
+
+        # One frame per cell on the search path: the values still untried
+        # there. trail holds the (row, col, value) placed in each frame.
+        frames = []
+        if size:
+            frames.append(values(0))
+            enter(0)
+        trail = []
+        tried = 0
+        while frames and len(trail) < size:
+            frame = frames[-1]
+            pos = len(frames) - 1
+            if len(trail) > pos:
+                # The value tried in this cell led nowhere after it.
+                if stats is not None:
+                    stats.backtracks += 1
+                row, col, value = trail.pop()
+                row_bits[value][row] &= ~(1 << col)
+                col_bits[value][col] &= ~(1 << row)
+            if not frame:
+                frames.pop()
+                continue
+            value = frame.pop()
+            row, col = divmod(pos, n)
+            if not fits(row, col, value):
+                continue
+            if budget is not None and tried == budget:
+                return None
+            tried += 1
+            if stats is not None:
+                _enter_node(stats, on_node, pos + 1)
+            row_bits[value][row] |= 1 << col
+            col_bits[value][col] |= 1 << row
+            trail.append((row, col, value))
+            if pos + 1 < size:
+                frames.append(values(pos + 1))
+                if col == n - 1:
+                    enter(row + 1)
+        if len(trail) < size:
+            return []
+        return row_bits[1]
+
+    def create_relations_from_solution(self, relations):
+        """
+        Picks up to `relations` adjacent pairs and labels them '=' or '×' from the solution.
+        """
+        possible_relations = []
+        for r in range(self.n):
+            for c in range(self.n):
+                if c < self.n - 1:
+                    possible_relations.append(((r, c), (r, c+1)))
+                if r < self.n - 1:
+                    possible_relations.append(((r, c), (r+1, c)))
+        selected = self._rng.sample(possible_relations, min(relations, len(possible_relations)))
+        relation_counts_row = [0] * self.n
+        relation_counts_col = [0] * self.n
+        result = {}
+        for (r1, c1), (r2, c2) in selected:
+            if self.solution[r1][c1] == self.solution[r2][c2]:
+                rel = '='
+                if r1 == r2:
+                    if relation_counts_row[r1] >= self.n//2 - 1:
+                        continue
+                    relation_counts_row[r1] += 1
+                else:
+                    if relation_counts_col[c1] >= self.n//2 - 1:
+                        continue
+                    relation_counts_col[c1] += 1
+            else:
+                rel = '×'
+            result[((r1, c1), (r2, c2))] = rel
+        return result
+
+    def is_valid_position(self, row, col, value):
+        # Run-length check on the row and column masks; balance is not checked here.
+        return _run_ok(self._row_bits[value][row], col, self.valid_num) and \
+            _run_ok(self._col_bits[value][col], row, self.valid_num)
+
+    def is_valid_position_local(self,b, row, col, value):
+        # Horizontal checks
+        if col >= 2 and b[row][col-1] == value and b[row][col-2] == value:
+            return False
+        if col <= self.n-3 and b[row][col+1] == value and b[row][col+2] == value:
+            return False
+        if col >= 1 and col <= self.n-2 and b[row][col-1] == value and b[row][col+1] == value:
+            return False
+        # Vertical checks
+        if row >= 2 and b[row-1][col] == value and b[row-2][col] == value:
+            return False
+        if row <= self.n-3 and b[row+1][col] == value and b[row+2][col] == value:
+            return False
+        if row >= 1 and row <= self.n-2 and b[row-1][col] == value and b[row+1][col] == value:
+            return False
+        # General adjacency check for valid_num
+        count = 1
+        for c in range(col-1, -1, -1):
+            if b[row][c] == value:
+                count += 1
+            else:
+                break
+            if count > self.valid_num:
+                return False
+        count = 1
+        for c in range(col+1, self.n):
+            if b[row][c] == value:
+                count += 1
+            else:
+                break
+            if count > self.valid_num:
+                return False
+        count = 1
+        for r in range(row-1, -1, -1):
+            if b[r][col] == value:
+                count += 1
+            else:
+                break
+            if count > self.valid_num:
+                return False
+        count = 1
+        for r in range(row+1, self.n):
+            if b[r][col] == value:
+                count += 1
+            else:
+                break
+            if count > self.valid_num:
+                return False
+        return True
+
+    def initialize_puzzle(self, known_cells, relations):
+        row_counts = [[0, 0] for _ in range(self.n)]
+        col_counts = [[0, 0] for _ in range(self.n)]
+
+        all_positions = [(r, c) for r in range(self.n) for c in range(self.n)]
+        selected_positions = []
+        attempts = 0
+        while len(selected_positions) < known_cells and attempts < 1000:
+            pos = random.choice(all_positions)
+            r, c = pos
+            value = self.board[r][c]
+            if row_counts[r][value] + 1 <= self.n//2 and col_counts[c][value] + 1 <= self.n//2:
+                selected_positions.append(pos)
+                row_counts[r][value] += 1
+                col_counts[c][value] += 1
+                all_positions.remove(pos)
+            attempts += 1
+
+        self.known_cells = [(r, c, self.board[r][c]) for r, c in selected_positions]
+
+        possible_relations = []
+        for r in range(self.n):
+            for c in range(self.n):
+                if c < self.n - 1:
+                    possible_relations.append(((r, c), (r, c+1)))
+                if r < self.n - 1:
+                    possible_relations.append(((r, c), (r+1, c)))
+        selected = random.sample(possible_relations, min(relations, len(possible_relations)))
+        relation_counts_row = [0] * self.n
+        relation_counts_col = [0] * self.n
+        for (r1, c1), (r2, c2) in selected:
+            if self.board[r1][c1] == self.board[r2][c2]:
+                rel = '='
+                if r1 == r2:
+                    if relation_counts_row[r1] >= self.n//2 - 1:
+                        continue
+                    relation_counts_row[r1] += 1
+                else:
+                    if relation_counts_col[c1] >= self.n//2 - 1:
+                        continue
+                    relation_counts_col[c1] += 1
+            else:
+                rel = '×'
+            self.relations[((r1, c1), (r2, c2))] = rel
+
+        self.board = [[-1 for _ in range(self.n)] for _ in range(self.n)]
+        for r, c, val in self.known_cells:
+            self._place(r, c, val)
+
+    def solve(self, strategy="propagate", stats=None, on_node=None, cache=None):
+        """
+        Fills the board with a solution, returning False if none exists.
+
+        strategy selects the engine: "propagate" runs constraint propagation
+        with most-constrained branching, "backtrack" walks cells in row-major
+        order and is only practical on small boards, and "cdcl" runs the
+        clause-learning solver in tango_cdcl, which suits large sparse boards.
+        "portfolio" races several of them in worker processes with
+        tango_portfolio and takes the first answer; on_node is not called
+        there and stats gets the winner's counters. Pass a SolveStats as
+        stats to collect search counters, and on_node to have on_node(stats)
+        called at every branching decision. With a tango_cache.SolveCache as
+        cache, known puzzles are answered from it.
+
+        "propagate" reasons over whole rows and columns. Up to n = 20 with the
+        fixed adjacency limit (n = 16 with the scaled one) a line test is a few
+        ANDs over the cached legal patterns; larger lines are scanned column
+        by column in O(n * n * limit), so a node costs O(n**4 * limit) there.
+        Nearly filled boards stay fast at any size, but sparse boards from
+        about n = 32 up can take long and suit "cdcl" better.
+        """
+        if cache is not None:
+            return cache.solve(self, strategy, stats, on_node)
+        solvers = {
+            "backtrack": self._solve_backtrack,
+            "propagate": self._solve_propagate,
+            "cdcl": self._solve_cdcl,
+            "portfolio": self._solve_portfolio,
+        }
+        if strategy not in solvers:
+            raise ValueError(f"Unknown solve strategy: {strategy}")
+        if on_node is not None and stats is None:
+            stats = SolveStats()
+        if stats is None:
+            return solvers[strategy]()
+        start = time.perf_counter()
+        try:
+            return solvers[strategy](stats, on_node)
+        finally:
+            stats.wall_time += time.perf_counter() - start
+
+    def _solve_cdcl(self, stats=None, on_node=None):
+        import tango_cdcl
+        return tango_cdcl.solve_board(self, stats, on_node)
+
+    def _solve_portfolio(self, stats=None, on_node=None):
+        import tango_portfolio
+        result = tango_portfolio.solve_portfolio(self)
+        if stats is not None and result['stats'] is not None:
+            winner = result['stats']
+            for name in ('nodes', 'backtracks', 'propagations', 'restarts'):
+                setattr(stats, name, getattr(stats, name) + winner[name])
+            stats.max_depth = max(stats.max_depth, winner['max_depth'])
+        return bool(result['solved'])
+
+    def _solve_backtrack(self, stats=None, on_node=None):
+        # Row-major search with an explicit stack, so board size is not bound
+        # by the recursion limit. Every assignment, including cells forced by
+        # relations, goes on the trail; a failed solve undoes all of it.
+        n = self.n
+        size = self.size
+        trail = []
+        # One frame per decision: (cell position, value tried, trail mark).
+        frames = []
+        pos = 0
+        value = 0
+        while True:
+            while pos < size and self.cell_value(pos // n, pos % n) != -1:
+                pos += 1
+            if pos == size:
+                # A full board with no line over half is balanced.
+                if self.is_valid_board():
+                    return True
+                value = 2
+            row, col = divmod(pos, n)
+            descended = False
+            while value < 2:
+                v = value
+                value += 1
+                if not self.can_place(row, col, v):
+                    continue
+                if stats is not None:
+                    _enter_node(stats, on_node, len(frames) + 1)
+                mark = len(trail)
+                self._place(row, col, v)
+                trail.append((row, col, v))
+                placed = []
+                # Forced neighbours are not checked against their own other
+                # relations, so the live conflict sets get the final say.
+                ok = self.propagate_relations(row, col, v, placed) and self.is_valid_board()
+                trail.extend(placed)
+                if ok:
+                    if stats is not None:
+                        stats.propagations += len(placed)
+                    frames.append((pos, v, mark))
+                    pos += 1
+                    value = 0
+                    descended = True
+                    break
+                if stats is not None:
+                    stats.backtracks += 1
+                self._undo(trail, mark)
+            if descended:
+                continue
+            if not frames:
+                return False
+            # Both values failed here: resume the previous decision.
+            pos, v, mark = frames.pop()
+            if stats is not None:
+                stats.backtracks += 1
+            self._undo(trail, mark)
+            value = v + 1
+
+    def propagate_relations(self, row, col, value, placed=None):
+        """
+        Forces the related neighbours of (row, col); assignments are appended to placed.
+        """
+        for other_r, other_c, rel in self._related(row, col):
+            other = self.cell_value(other_r, other_c)
+            if other == -1:
+                new_value = value if rel == '=' else 1 - value
+                if self.can_place(other_r, other_c, new_value):
+                    self._place(other_r, other_c, new_value)
+                    if placed is not None:
+                        placed.append((other_r, other_c, new_value))
+                else:
+                    return False
+            else:
+                if rel == '=' and other != value:
+                    return False
+                if rel == '×' and other == value:
+                    return False
+        return True
+
+    def _cell_domain(self, row, col):
+        # Candidate domain of an empty cell as a bitmask: bit v is set when v
+        # passes balance, adjacency and every relation with a filled neighbour.
+        # Domains are read off the bitboard, so undoing the trail restores them.
+        domain = 0
+        for value in (0, 1):
+            if not self.can_place(row, col, value):
+                continue
+            for r, c, rel in self._related(row, col):
+                other = self.cell_value(r, c)
+                if other != -1 and (other == value) != (rel == '='):
+                    break
+            else:
+                domain |= 1 << value
+        return domain
+
+    def _line_candidates(self, line, no_one, no_zero):
+        """
+        Returns the legal patterns for a row (0..n-1) or column (n..2n-1) that
+        avoid S in no_one, avoid M in no_zero and respect the relations inside it.
+        """
+        n = self.n
+        table = _row_pattern_table(n, self.valid_num)
+        candidates = table.compatible(no_one, no_zero)
+        if line < n:
+            edges, start, step = self._h_rel, line * (n - 1), 1
+        else:
+            edges, start, step = self._v_rel, line - n, n
+        for i in range(n - 1):
+            code = edges[start + i * step]
+            if code == 1:
+                candidates &= ~table.differ[i]
+            elif code == 2:
+                candidates &= table.differ[i]
+        return candidates
+
+    def _line_edges(self, line):
+        # (same, differ) masks of the relations inside a line: bit i links
+        # its cells i and i + 1.
+        n = self.n
+        if line < n:
+            edges, start, step = self._h_rel, line * (n - 1), 1
+        else:
+            edges, start, step = self._v_rel, line - n, n
+        same = differ = 0
+        for i in range(n - 1):
+            code = edges[start + i * step]
+            if code == 1:
+                same |= 1 << i
+            elif code == 2:
+                differ |= 1 << i
+        return same, differ
+
+    def _scan_line(self, line, no_one, no_zero):
+        same, differ = self._line_edges(line)
+        return _scan_line(self.n, self.valid_num, no_one, no_zero, same, differ)
+
+    def _line_support(self, line, no_one, no_zero):
+        """
+        Returns (can_zero, can_one) masks of the cells of a line that some
+        legal pattern avoiding S in no_one and M in no_zero, and respecting
+        the relations inside the line, fills with M or with S; None when no
+        pattern fits. Uses the pattern table when the line size allows it.
+        """
+        n = self.n
+        table = _pattern_table_or_none(n, self.valid_num)
+        if table is None:
+            ways = self._scan_line(line, no_one, no_zero)
+            if ways is None:
+                return None
+            return tuple(sum(1 << i for i, count in enumerate(counts) if count) for counts in ways)
+        candidates = self._line_candidates(line, no_one, no_zero)
+        if not candidates:
+            return None
+        can_zero, can_one = no_one, no_zero
+        open_cells = ((1 << n) - 1) & ~(no_one | no_zero)
+        while open_cells:
+            low = open_cells & -open_cells
+            open_cells ^= low
+            i = low.bit_length() - 1
+            if candidates & table.with_one[i]:
+                can_one |= low
+            if candidates & table.with_zero[i]:
+                can_zero |= low
+        return can_zero, can_one
+
+    def _propagate(self, lines, trail):
+        """
+        Applies forced moves until nothing changes; returns False on a contradiction.
+
+        lines holds the dirty rows (0..n-1) and columns (n..2n-1) to re-examine.
+        Every assignment is pushed onto trail as (row, col, value).
+        """
+        n = self.n
+        full = (1 << n) - 1
+        dirty = [False] * (2 * n)
+        for line in lines:
+            dirty[line] = True
+        queue = list(lines)
+        while queue:
+            line = queue.pop()
+            dirty[line] = False
+            if line < n:
+                zeros, ones = self._row_bits[0][line], self._row_bits[1][line]
+            else:
+                zeros, ones = self._col_bits[0][line - n], self._col_bits[1][line - n]
+            empties = full & ~(zeros | ones)
+            if not empties:
+                continue
+            # Each empty cell's own domain (adjacency, balance, relations with
+            # filled neighbours) narrows the line's legal patterns, and the
+            # surviving patterns in turn fix any cell they all agree on.
+            no_one, no_zero = zeros, ones
+            cells = []
+            while empties:
+                low = empties & -empties
+                empties ^= low
+                i = low.bit_length() - 1
+                row, col = (line, i) if line < n else (i, line - n)
+                domain = self._cell_domain(row, col)
+                if domain == 0:
+                    return False
+                if not domain & 2:
+                    no_one |= low
+                if not domain & 1:
+                    no_zero |= low
+                cells.append((i, row, col))
+            support = self._line_support(line, no_one, no_zero)
+            if support is None:
+                return False
+            can_zero, can_one = support
+            for i, row, col in cells:
+                value = can_one >> i & 1
+                if value and can_zero >> i & 1:
+                    continue
+                if not self._cell_domain(row, col) >> value & 1:
+                    return False
+                self._place(row, col, value)
+                trail.append((row, col, value))
+                for touched in (row, n + col):
+                    if not dirty[touched]:
+                        dirty[touched] = True
+                        queue.append(touched)
+        return True
+
+    def _pick_branch(self):
+        """
+        Returns (row, col, values) for the most-constrained empty cell, or None
+        when the board is full.
+
+        The cell is taken from the line with the fewest legal patterns left,
+        and values lists the symbol more of those patterns agree with first.
+        """
+        n = self.n
+        full = (1 << n) - 1
+        table = _pattern_table_or_none(n, self.valid_num)
+        best = None
+        for line in range(2 * n):
+            if line < n:
+                zeros, ones = self._row_bits[0][line], self._row_bits[1][line]
+            else:
+                zeros, ones = self._col_bits[0][line - n], self._col_bits[1][line - n]
+            if zeros | ones == full:
+                continue
+            if table is None:
+                patterns = self._scan_line(line, zeros, ones)
+                count = patterns[0][0] + patterns[1][0] if patterns else 0
+            else:
+                patterns = self._line_candidates(line, zeros, ones)
+                count = _popcount(patterns)
+            if best is None or count < best[0]:
+                best = (count, line, zeros | ones, patterns)
+        if best is None:
+            return None
+        _, line, filled, patterns = best
+        empties = full & ~filled
+        i = (empties & -empties).bit_length() - 1
+        row, col = (line, i) if line < n else (i, line - n)
+        if table is None:
+            zeros, ones = (patterns[0][i], patterns[1][i]) if patterns else (0, 0)
+        else:
+            ones = _popcount(patterns & table.with_one[i])
+            zeros = _popcount(patterns & table.with_zero[i])
+        return row, col, ((1, 0) if ones > zeros else (0, 1))
+
+    def _undo(self, trail, mark):
+        while len(trail) > mark:
+            row, col, value = trail.pop()
+            self._unplace(row, col, value)
+
+    def _search(self, trail, on_solution, stats=None, on_node=None):
+        """
+        Branches on most-constrained cells below the current propagated state.
+
+        on_solution is called on every full board; returning True stops the
+        search with that board still filled in. Otherwise the trail is undone
+        back to where it was on entry.
+        """
+        # One frame per decision: [row, col, values, next value index, trail mark].
+        frames = []
+        branch = self._pick_branch()
+        while True:
+            if branch is None:
+                if on_solution():
+                    return True
+            else:
+                row, col, values = branch
+                frames.append([row, col, values, 0, len(trail)])
+            branch = None
+            while frames:
+                frame = frames[-1]
+                row, col, values, i, mark = frame
+                if len(trail) > mark:
+                    if stats is not None:
+                        stats.backtracks += 1
+                    self._undo(trail, mark)
+                if i == len(values):
+                    frames.pop()
+                    continue
+                frame[3] = i + 1
+                value = values[i]
+                if not self._cell_domain(row, col) >> value & 1:
+                    continue
+                if stats is not None:
+                    _enter_node(stats, on_node, len(frames))
+                self._place(row, col, value)
+                trail.append((row, col, value))
+                ok = self._propagate([row, self.n + col], trail)
+                if stats is not None:
+                    stats.propagations += len(trail) - mark - 1
+                if ok:
+                    branch = self._pick_branch()
+                    break
+            else:
+                return False
+
+    def _solve_propagate(self, stats=None, on_node=None):
+        if not self.is_valid_board():
+            return False
+        trail = []
+        ok = self._propagate(list(range(2 * self.n)), trail)
+        if stats is not None:
+            stats.propagations += len(trail)
+        if ok and self._search(trail, lambda: True, stats, on_node):
+            return True
+        self._undo(trail, 0)
+        return False
+
+    def count_solutions(self, limit=2):
+        """
+        Counts the solutions of the current puzzle, stopping once limit are found.
+
+        The board is left exactly as it was, so this is safe inside generation loops.
+        """
+        if limit <= 0 or not self.is_valid_board():
+            return 0
+        trail = []
+        found = 0
+
+        def on_solution():
+            nonlocal found
+            found += 1
+            return found >= limit
+
+        if self._propagate(list(range(2 * self.n)), trail):
+            self._search(trail, on_solution)
+        self._undo(trail, 0)
+        return found
+
+    def is_unique(self):
+        """
+        Returns True when the current puzzle has exactly one solution.
+        """
+        return self.count_solutions(limit=2) == 1
+
+    def _logic_round(self, tier):
+        """
+        Returns {(row, col): value} for every empty cell the given rule tier
+        forces on the current board, or None on a contradiction.
+        """
+        n = self.n
+        half = n // 2
+        limit = self.valid_num
+        full = (1 << n) - 1
+        row_bits, col_bits = self._row_bits, self._col_bits
+        forced = {}
+
+        def force(row, col, value):
+            # False when another deduction this round wants the other symbol.
+            return forced.setdefault((row, col), value) == value
+
+        if tier == 'balance':
+            for line in range(2 * n):
+                if line < n:
+                    zeros, ones = row_bits[0][line], row_bits[1][line]
+                else:
+                    zeros, ones = col_bits[0][line - n], col_bits[1][line - n]
+                empties = full & ~(zeros | ones)
+                if not empties:
+                    continue
+                for value, mask in ((0, zeros), (1, ones)):
+                    if _popcount(mask) != half:
+                        continue
+                    while empties:
+                        low = empties & -empties
+                        empties ^= low
+                        i = low.bit_length() - 1
+                        row, col = (line, i) if line < n else (i, line - n)
+                        if not force(row, col, 1 - value):
+                            return None
+        elif tier == 'pair':
+            for row in range(n):
+                empties = full & ~(row_bits[0][row] | row_bits[1][row])
+                while empties:
+                    low = empties & -empties
+                    empties ^= low
+                    col = low.bit_length() - 1
+                    for value in (0, 1):
+                        if not (_run_ok(row_bits[value][row], col, limit) and _run_ok(col_bits[value][col], row, limit)):
+                            if not force(row, col, 1 - value):
+                                return None
+        elif tier == 'relation':
+            for vertical, edges in ((False, self._h_rel), (True, self._v_rel)):
+                for index, code in enumerate(edges):
+                    if not code:
+                        continue
+                    if vertical:
+                        r1, c1 = divmod(index, n)
+                        r2, c2 = r1 + 1, c1
+                    else:
+                        r1, c1 = divmod(index, n - 1)
+                        r2, c2 = r1, c1 + 1
+                    a = self.cell_value(r1, c1)
+                    b = self.cell_value(r2, c2)
+                    if (a == -1) == (b == -1):
+                        if a != -1:
+                            continue
+                        # Both empty: each cell can only take values whose
+                        # partner the other cell can still take.
+                        da = (self.can_place(r1, c1, 0)) | (self.can_place(r1, c1, 1) << 1)
+                        db = (self.can_place(r2, c2, 0)) | (self.can_place(r2, c2, 1) << 1)
+                        if code == 2:
+                            da, db = (da >> 1 | da << 1) & 3, (db >> 1 | db << 1) & 3
+                        both = da & db
+                        if both == 0:
+                            return None
+                        if both != 3:
+                            value = both >> 1
+                            if not (force(r1, c1, value) and force(r2, c2, value if code == 1 else 1 - value)):
+                                return None
+                    elif a == -1:
+                        if not force(r1, c1, b if code == 1 else 1 - b):
+                            return None
+                    elif not force(r2, c2, a if code == 1 else 1 - a):
+                        return None
+        elif tier == 'line':
+            for line in range(2 * n):
+                if line < n:
+                    zeros, ones = row_bits[0][line], row_bits[1][line]
+                else:
+                    zeros, ones = col_bits[0][line - n], col_bits[1][line - n]
+                empties = full & ~(zeros | ones)
+                if not empties:
+                    continue
+                support = self._line_support(line, zeros, ones)
+                if support is None:
+                    return None
+                can_zero, can_one = support
+                empties &= ~(can_zero & can_one)
+                while empties:
+                    low = empties & -empties
+                    empties ^= low
+                    i = low.bit_length() - 1
+                    row, col = (line, i) if line < n else (i, line - n)
+                    if not force(row, col, can_one >> i & 1):
+                        return None
+        else:
+            raise ValueError(f"Unknown rule tier: {tier}")
+        return forced
+
+    def grade(self):
+        """
+        Solves the current puzzle with human deduction rules alone and reports
+        how hard that was; the board is left as it was.
+
+        Each round applies every deduction of the easiest tier in LOGIC_TIERS
+        that finds one. Returns a dict with:
+            solved      True when the rules fill the whole board
+            difficulty  'easy', 'medium' or 'hard' after the hardest tier used,
+                        'guess' when the rules get stuck, 'invalid' on a
+                        contradiction
+            rules       cells deduced per tier
+            rounds      number of deduction rounds
+        """
+        trail = []
+        rules = dict.fromkeys(LOGIC_TIERS, 0)
+        rounds = 0
+        ok = self.is_valid_board()
+        while ok:
+            for tier in LOGIC_TIERS:
+                forced = self._logic_round(tier)
+                if forced is None:
+                    ok = False
+                    break
+                if forced:
+                    for (row, col), value in forced.items():
+                        self._place(row, col, value)
+                        trail.append((row, col, value))
+                    rules[tier] += len(forced)
+                    rounds += 1
+                    ok = self.is_valid_board()
+                    break
+            else:
+                break
+        filled = sum(_popcount(mask) for bits in self._row_bits for mask in bits)
+        solved = ok and filled == self.size
+        self._undo(trail, 0)
+        if not ok:
+            difficulty = 'invalid'
+        elif not solved:
+            difficulty = 'guess'
+        else:
+            used = [tier for tier in LOGIC_TIERS if rules[tier]]
+            difficulty = _TIER_DIFFICULTY[used[-1]] if used else 'easy'
+        return {'solved': solved, 'difficulty': difficulty, 'rules': rules, 'rounds': rounds}
+
+    @classmethod
+    def minimal_puzzle(cls, n=6, relations=8, adjacency_limit=2, target_clues=0, seed=None, logic_only=False):
+        """
+        Builds a puzzle with a unique solution by revealing the full solution and
+        removing clues one at a time while the solution stays unique.
+
+        With logic_only a clue is only removed while grade() can still solve
+        the puzzle without guessing. Stops once target_clues remain or no
+        remaining clue can be removed.
+        """
+        board = cls(n=n, known_cells=n * n, relations=relations, adjacency_limit=adjacency_limit, seed=seed)
+        known = set(board.known_cells)
+        order = list(board.known_cells)
+        board._rng.shuffle(order)
+        for row, col, value in order:
+            if len(known) <= target_clues:
+                break
+            board._unplace(row, col, value)
+            if board.grade()['solved'] if logic_only else board._is_forced(row, col, value):
+                known.discard((row, col, value))
+            else:
+                board._place(row, col, value)
+        board.known_cells = [cell for cell in board.known_cells if cell in known]
+        board.known_cells_count = len(board.known_cells)
+        return board
+
+    def _is_forced(self, row, col, value):
+        # The puzzle had one solution with value at (row, col), so it stays
+        # unique without that clue exactly when the other symbol cannot be
+        # completed. The board state is shared across calls; only the trail
+        # of this probe is undone.
+        other = 1 - value
+        if not self._cell_domain(row, col) >> other & 1:
+            return True
+        trail = [(row, col, other)]
+        self._place(row, col, other)
+        solvable = self._propagate([row, self.n + col], trail) \
+            and self._search(trail, lambda: True)
+        self._undo(trail, 0)
+        return not solvable
+
+    def toggle_cell(self, row, col):
+        if (row, col, 0) in self.known_cells or (row, col, 1) in self.known_cells:
+            return
+
+        current = self.cell_value(row, col)
+        if current == -1:
+            new_value = 0
+        elif current == 0:
+            new_value = 1
+        else:
+            new_value = -1
+
+        self.set_cell(row, col, new_value)
+
+    def candidates(self, row, col):
+        """
+        Returns the symbols an empty cell can still take under the line rules
+        and its relations, e.g. (0, 1), (1,) or () on a dead end; a filled
+        cell returns its own value.
+        """
+        value = self.cell_value(row, col)
+        if value != -1:
+            return (value,)
+        self._sync_hints()
+        domain = self._domains[row * self.n + col]
+        return tuple(v for v in (0, 1) if domain >> v & 1)
+
+    def next_hint(self):
+        """
+        Returns (row, col, value, rule) for an empty cell the current position
+        forces, or None when no rule forces one.
+
+        rule is the LOGIC_TIERS tier that explains it, and the easiest tier
+        with a forced cell is reported first. Only the rows and columns that
+        changed since the last call are re-examined, so this stays cheap
+        between moves.
+        """
+        self._sync_hints()
+        for tier in LOGIC_TIERS[:-1]:
+            forced = self._cell_hints[tier]
+            if forced:
+                (row, col), value = next(iter(forced.items()))
+                return row, col, value, tier
+        for forced in self._line_hints:
+            if forced:
+                (row, col), value = next(iter(forced.items()))
+                return row, col, value, 'line'
+        return None
+
+    def _sync_hints(self):
+        # Brings the candidate domains and forced cells up to date with the
+        # board. Rows whose masks changed since the last sync name the changed
+        # cells; a cell's domain only depends on its own row and column and on
+        # its relation partners, so only those are recomputed. Relation edits,
+        # a new adjacency limit or a new size rebuild everything.
+        n = self.n
+        zeros, ones = self._row_bits
+        seen = self._hint_seen
+        if seen is None or seen[2] != self._relation_version or seen[3] != self.valid_num or len(seen[0]) != n:
+            self._domains = [0] * (n * n)
+            self._cell_tiers = {}
+            self._cell_hints = {tier: {} for tier in LOGIC_TIERS[:-1]}
+            self._line_hints = [{} for _ in range(2 * n)]
+            rows = set(range(n))
+            cols = (1 << n) - 1
+        else:
+            rows = set()
+            cols = 0
+            for r in range(n):
+                diff = (zeros[r] ^ seen[0][r]) | (ones[r] ^ seen[1][r])
+                if diff:
+                    rows.add(r)
+                    cols |= diff
+        self._hint_seen = (list(zeros), list(ones), self._relation_version, self.valid_num)
+        if not rows:
+            return
+        cells = {(r, c) for r in rows for c in range(n)}
+        for c in range(n):
+            if cols >> c & 1:
+                cells.update((r, c) for r in range(n))
+        for row, col in list(cells):
+            for r, c, _ in self._related(row, col):
+                cells.add((r, c))
+        for row, col in cells:
+            self._update_cell_hint(row, col)
+        for line in sorted(rows) + [n + c for c in range(n) if cols >> c & 1]:
+            if line < n:
+                no_one, no_zero = zeros[line], ones[line]
+            else:
+                no_one, no_zero = self._col_bits[0][line - n], self._col_bits[1][line - n]
+            filled = no_one | no_zero
+            forced = {}
+            support = self._line_support(line, no_one, no_zero)
+            if support is not None:
+                can_zero, can_one = support
+                for i in range(n):
+                    if filled >> i & 1 or can_zero >> i & can_one >> i & 1:
+                        continue
+                    forced[(line, i) if line < n else (i, line - n)] = can_one >> i & 1
+            self._line_hints[line] = forced
+
+    def _update_cell_hint(self, row, col):
+        # Recomputes one cell's domain and files it under the tier that rules
+        # out the other symbol, mirroring the deductions of _logic_round.
+        previous = self._cell_tiers.pop((row, col), None)
+        if previous is not None:
+            del self._cell_hints[previous][(row, col)]
+        index = row * self.n + col
+        if self.cell_value(row, col) != -1:
+            self._domains[index] = 0
+            return
+        half = self.n // 2
+        limit = self.valid_num
+        domain = self._cell_domain(row, col)
+        tier = None
+        if domain in (1, 2):
+            other = 1 - (domain >> 1)
+            if _popcount(self._row_bits[other][row]) >= half or _popcount(self._col_bits[other][col]) >= half:
+                tier = 'balance'
+            elif not (_run_ok(self._row_bits[other][row], col, limit) and _run_ok(self._col_bits[other][col], row, limit)):
+                tier = 'pair'
+            else:
+                tier = 'relation'
+        elif domain == 3:
+            # Both symbols fit locally; an empty partner that can only take
+            # one symbol still decides this cell through the relation.
+            for r, c, rel in self._related(row, col):
+                if self.cell_value(r, c) != -1:
+                    continue
+                partner = self.can_place(r, c, 0) | self.can_place(r, c, 1) << 1
+                if rel == '×':
+                    partner = (partner >> 1 | partner << 1) & 3
+                domain &= partner
+            if domain in (1, 2):
+                tier = 'relation'
+        self._domains[index] = domain
+        if tier is not None:
+            self._cell_tiers[(row, col)] = tier
+            self._cell_hints[tier][(row, col)] = domain >> 1
+
+    def make_puzzle_board(self, known_cells):
+        """Return (board,row_counts,col_counts,known_cells) ready for play."""
+        board = [[-1]*self.n for _ in range(self.n)]
+        row_ct = [[0,0] for _ in range(self.n)]
+        col_ct = [[0,0] for _ in range(self.n)]
+
+        all_pos = [(r,c) for r in range(self.n) for c in range(self.n)]
+        selected = self._rng.sample(all_pos, min(known_cells, len(all_pos)))
+
+        known = []
+        for r,c in selected:
+            val = self.solution[r][c]
+            board[r][c] = val
+            row_ct[r][val] += 1
+            col_ct[c][val] += 1
+            known.append((r,c,val))
+
+        return board, row_ct, col_ct, known
+
+    def is_valid_board(self):
+        # Conflicts are maintained on every change, so this is O(1). A full
+        # board with no line over half is necessarily balanced.
+        return not (self._overflow or self._bad_runs or self._broken)
+
+    def conflicts(self):
+        """
+        Returns the sorted (row, col) cells involved in any rule violation.
+        """
+        n = self.n
+        cells = set()
+        for line, value in self._overflow:
+            if line < n:
+                mask, cell = self._row_bits[value][line], lambda i: (line, i)
+            else:
+                mask, cell = self._col_bits[value][line - n], lambda i: (i, line - n)
+            cells.update(cell(i) for i in range(n) if mask >> i & 1)
+        for line, value, start in self._bad_runs:
+            for i in range(start, start + self.valid_num + 1):
+                cells.add((line, i) if line < n else (i, line - n))
+        for vertical, index in self._broken:
+            if vertical:
+                r, c = divmod(index, n)
+                cells.update(((r, c), (r + 1, c)))
+            else:
+                r, c = divmod(index, n - 1)
+                cells.update(((r, c), (r, c + 1)))
+        return sorted(cells)
+
+    def to_dict(self):
+        """
+        Returns the board state in the save_board JSON layout.
+        """
+        return {
+            'n': self.n,
+            'valid_num': self.valid_num,
+            'board': [list(row) for row in self.board],
+            'relations': {f"{r1},{c1}->{r2},{c2}": rel for ((r1, c1), (r2, c2)), rel in self.relations.items()},
+            'known_cells': self.known_cells,
+            'row_counts': self.row_counts,
+            'col_counts': self.col_counts,
+            'known_cells_count': self.known_cells_count,
+            'relations_count': self.relations_count
+        }
+
+    def to_json(self):
+        """
+        Returns the board state as a JSON string in the save_board layout.
+        """
+        import json
+        return json.dumps(self.to_dict(), ensure_ascii=False)
+
+    def __getstate__(self):
+        # The shared module generator cannot be pickled; a board without a
+        # generator of its own goes back to the shared one when unpickled.
+        state = self.__dict__.copy()
+        if state['_rng'] is random:
+            state['_rng'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self._rng is None:
+            self._rng = random
+
+    def solved(self, strategy="propagate"):
+        """
+        Returns a solved copy of the board, or None when it has no solution.
+
+        The board itself is not changed, so this can be handed to a worker
+        process and the result sent back.
+        """
+        board = copy.deepcopy(self)
+        return board if board.solve(strategy) else None
+
+    def cell_symbol(self, row, col):
+        """
+        Returns "M", "S" or "" for an empty cell, as the front ends display it.
+        """
+        return _CELL_SYMBOLS[self.cell_value(row, col)]
+
+    def _cell_codes(self):
+        # Row-major cell codes of the current position: 0 empty, 1 M, 2 S.
+        n = self.n
+        zeros, ones = self._row_bits
+        return [(zeros[r] >> c & 1) | (ones[r] >> c & 1) << 1 for r in range(n) for c in range(n)]
+
+    def _edge_codes(self):
+        # Relation codes of the horizontal then the vertical edges, as bytes;
+        # kept until the next relation edit.
+        if self._edge_cache is None or self._edge_cache[0] != self._relation_version:
+            self._edge_cache = (self._relation_version, bytes(self._h_rel) + bytes(self._v_rel))
+        return self._edge_cache[1]
+
+    def _given_codes(self):
+        # Row-major cell codes of the known cells alone, as _cell_codes.
+        codes = [0] * (self.n * self.n)
+        for r, c, value in self.known_cells:
+            codes[r * self.n + c] = value + 1
+        return codes
+
+    def encode(self, canonical=False):
+        """
+        Returns a compact byte encoding of the puzzle: n, the adjacency limit,
+        then the known cells and the relation edges at 2 bits each.
+
+        Only the givens (known_cells) are encoded, not moves played on top of
+        them, so a puzzle keeps its encoding and puzzle_hash() while it is
+        being played.
+
+        With canonical, the smallest encoding over the 8 rotations and
+        reflections of the grid, each with and without swapping M and S, is
+        returned, so equivalent puzzles share one encoding.
+        """
+        if canonical:
+            return self._canonical_form()[0]
+        header = bytes((self.n, self.valid_num))
+        return header + _pack_codes(self._given_codes()) + _pack_codes(self._edge_codes())
+
+    def _canonical_form(self):
+        """
+        Returns (encoding, cell_src, swap) for the smallest symmetric variant:
+        canonical cell i is this board's cell cell_src[i], with M and S
+        exchanged when swap is 1.
+        """
+        header = bytes((self.n, self.valid_num))
+        cells = self._given_codes()
+        edges = self._edge_codes()
+        best = None
+        for cell_src, edge_src in _symmetry_tables(self.n):
+            moved = [cells[i] for i in cell_src]
+            packed_edges = _pack_codes([edges[i] for i in edge_src])
+            for swap, variant in enumerate((moved, [(0, 2, 1)[code] for code in moved])):
+                encoding = header + _pack_codes(variant) + packed_edges
+                if best is None or encoding < best[0]:
+                    best = (encoding, cell_src, swap)
+        return best
+
+    def puzzle_hash(self, canonical=False):
+        """
+        Returns a stable hex digest of encode(canonical), usable as a key
+        across processes and runs.
+        """
+        import hashlib
+        return hashlib.blake2b(self.encode(canonical), digest_size=16).hexdigest()
+
+    @classmethod
+    def from_encoding(cls, data):
+        """
+        Builds a board from encode() output, with the encoded cells as its known cells.
+        """
+        n, limit = data[0], data[1]
+        cell_bytes = (2 * n * n + 7) // 8
+        cells = int.from_bytes(data[2:2 + cell_bytes], "little")
+        edges = int.from_bytes(data[2 + cell_bytes:], "little")
+        board = cls.__new__(cls)
+        board._rng = random
+        board.valid_num = limit
+        board._reset_state(n)
+        h_count = n * (n - 1)
+        board._h_rel = bytearray(edges >> (2 * i) & 3 for i in range(h_count))
+        board._v_rel = bytearray(edges >> (2 * (h_count + i)) & 3 for i in range(h_count))
+        board._relation_version += 1
+        board.known_cells = []
+        for i in range(n * n):
+            code = cells >> (2 * i) & 3
+            if code:
+                r, c = divmod(i, n)
+                board._place(r, c, code - 1)
+                board.known_cells.append((r, c, code - 1))
+        board.solution = None
+        board.known_cells_count = len(board.known_cells)
+        board.relations_count = len(board.relations)
+        return board
+
+    def save_board(self, filename):
+        """
+        Saves the current board state to a file.
+        """
+        import json
+        with open(filename, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+    def load_board(self, filename):
+        """
+        Loads a board state from a file.
+        """
+        import json
+        with open(filename, 'r') as f:
+            board_state = json.load(f)
+        self._reset_state(board_state['n'])
+        self.valid_num = board_state['valid_num']
+        self.board = board_state['board']
+        self.relations = {}
+        for key, rel in board_state['relations'].items():
+            coords = key.split('->')
+            pos1 = coords[0].split(',')
+            pos2 = coords[1].split(',')
+            r1, c1 = int(pos1[0]), int(pos1[1])
+            r2, c2 = int(pos2[0]), int(pos2[1])
+            self.relations[((r1, c1), (r2, c2))] = rel
+        self.known_cells = [(r, c, val) for r, c, val in board_state['known_cells']]
+        self.known_cells_count = board_state['known_cells_count']
+        self.relations_count = board_state['relations_count']
+    
+    @classmethod
+    def from_bank(cls, bank, k):
+        """
+        Builds puzzle number k of an open tango_bank.PuzzleBank without generating anything.
+        """
+        solution, known_cells, h_rel, v_rel = bank.read(k)
+        board = cls.__new__(cls)
+        board._rng = random
+        board.valid_num = bank.adjacency_limit
+        board._reset_state(bank.n)
+        board._h_rel = h_rel
+        board._v_rel = v_rel
+        board._relation_version += 1
+        board.solution = solution
+        board.known_cells = known_cells
+        for r, c, value in known_cells:
+            board._place(r, c, value)
+        board.known_cells_count = len(known_cells)
+        board.relations_count = len(board.relations)
+        return board
+
+    def print_board_to_string(self):
+        """
+        Returns a string representation of the board and its relations.
+        """
+        board_str = "Board:\n"
+        for r in range(self.n):
+            row = []
+            for c in range(self.n):
+                value = self.cell_value(r, c)
+                if value == 0:
+                    row.append("M")
+                elif value == 1:
+                    row.append("S")
+                else:
+                    row.append(".")
+            board_str += " ".join(row) + "\n"
+        board_str += "\nRelations:\n"
+        for (r1, c1), (r2, c2) in self.relations:
+            board_str += f"({r1},{c1})-({r2},{c2}): {self.relations[((r1, c1), (r2, c2))]}\n"
+        return board_str
@@ -0,0 +1,226 @@
+"""
+Exact counting and uniform sampling of full Tango solution grids.
+
+    count_grids(8)                          # 12413918 grids with the default limit of 2
+    sample_grid(8, rng=random.Random(1))    # rows of 0/1, uniform over all of them
+
+A transfer-matrix dynamic program over rows. The state after some rows holds,
+for every column, its S and M counts, its last symbol and the length of its
+trailing run; the transitions are the legal row patterns of that size, so
+rows are always legal and only the columns need tracking. A column state that
+could not be completed (balance or adjacency) is never entered.
+
+GridCounter memoizes the number of completions of every state it meets. A
+state, its mirror image and its M/S swap complete in the same number of ways,
+so they share one entry. From an adjacency limit of n / 2 up (the GUI's
+scaled mode) no run can break the limit, columns become interchangeable and
+states are kept up to column order, which makes those sizes cheap: n = 12
+counts in a fraction of a second, n = 14 in under two and n = 16 in about
+twenty.
+
+Below that the state space grows about twentyfold with every two extra
+columns. With the fixed limit of 2, n = 8 takes about half a second, but
+n = 10 takes a couple of minutes and some 600 MB in CPython. A limit of 3
+takes over a minute at n = 8. So n >= 14 is only in reach with the scaled
+limit. practical() accepts the sizes that finish in about a second, which is
+what TangoBoard.generate_solution(uniform=True) allows.
+"""
+import functools
+import itertools
+import math
+import random
+
+from tango_core import _line_completable, _row_pattern_table
+
+# Largest n handled for an adjacency limit below n / 2 and for the scaled
+# limit, in about a second at most. Limit 1 allows only the two alternating
+# grids at any size.
+_MAX_SIZE = {2: 8}
+_MAX_SCALED_SIZE = 14
+
+def practical(n, adjacency_limit=2):
+    """
+    Returns True when counting or sampling the grids of (n, adjacency_limit)
+    finishes in about a second with a small memo.
+    """
+    if adjacency_limit <= 1:
+        return True
+    if adjacency_limit >= n // 2:
+        return n <= _MAX_SCALED_SIZE
+    return n <= _MAX_SIZE.get(adjacency_limit, 0)
+
+class GridCounter:
+    """
+    Counts and samples the full grids of one (n, adjacency_limit).
+    """
+    def __init__(self, n, adjacency_limit=2):
+        if n <= 0 or n % 2:
+            raise ValueError("Board side length must be a positive even number")
+        self.n = n
+        self.limit = adjacency_limit
+        self._table = _row_pattern_table(n, adjacency_limit)
+        half = n // 2
+        # Column states (ones, zeros, last, run) are numbered as they are
+        # first reached from the empty column 0; _step[code] holds the codes
+        # after an M and after an S, or -1 when the column could not be
+        # completed from there.
+        self._columns = [(0, 0, 0, 0)]
+        index = {self._columns[0]: 0}
+        self._step = []
+        code = 0
+        while code < len(self._columns):
+            ones, zeros, last, run = self._columns[code]
+            nexts = []
+            for bit in (0, 1):
+                length = run + 1 if run and bit == last else 1
+                column = (ones + bit, zeros + 1 - bit, bit, length)
+                if length > adjacency_limit or not _line_completable(
+                        n - ones - zeros - 1, half - ones - bit, bit, length, adjacency_limit):
+                    nexts.append(-1)
+                    continue
+                if length + half - column[1 - bit] <= adjacency_limit:
+                    # Even every remaining symbol of this kind could not
+                    # stretch the run past the limit, so forget it.
+                    column = (column[0], column[1], 0, 0)
+                if column not in index:
+                    index[column] = len(self._columns)
+                    self._columns.append(column)
+                nexts.append(index[column])
+            self._step.append(tuple(nexts))
+            code += 1
+        self._swap = [index[(zeros, ones, 1 - last, run) if run else (zeros, ones, 0, 0)]
+                      for ones, zeros, last, run in self._columns]
+        # From a limit of half upwards no run can break it, so only the counts
+        # matter and columns can be reordered freely.
+        self._exchangeable = adjacency_limit >= half
+        self._memo = {}
+
+    def _start(self):
+        return (0,) * self.n
+
+    def _key(self, state):
+        swapped = tuple(self._swap[code] for code in state)
+        if self._exchangeable:
+            return min(tuple(sorted(state)), tuple(sorted(swapped)))
+        return min(state, state[::-1], swapped, swapped[::-1])
+
+    def _children(self, state):
+        # Yields (pattern, next state, weight) for the legal rows after state.
+        # weight is 1, except with exchangeable columns, where one pattern
+        # stands for the weight rows that put as many S in every group of
+        # equal columns and so lead to the same state up to column order.
+        step = self._step
+        if self._exchangeable:
+            yield from self._grouped_children(state)
+            return
+        no_one = no_zero = 0
+        for c, code in enumerate(state):
+            after_zero, after_one = step[code]
+            if after_one < 0:
+                no_one |= 1 << c
+            if after_zero < 0:
+                no_zero |= 1 << c
+        patterns = self._table.patterns
+        candidates = self._table.compatible(no_one, no_zero)
+        while candidates:
+            low = candidates & -candidates
+            candidates ^= low
+            pattern = patterns[low.bit_length() - 1]
+            yield pattern, tuple(step[code][pattern >> c & 1] for c, code in enumerate(state)), 1
+
+    def _grouped_children(self, state):
+        step = self._step
+        groups = {}
+        for c, code in enumerate(state):
+            groups.setdefault(code, []).append(c)
+        ranges = []
+        for code, columns in groups.items():
+            after_zero, after_one = step[code]
+            ranges.append(range(0 if after_zero >= 0 else len(columns),
+                                (len(columns) if after_one >= 0 else 0) + 1))
+        for takes in itertools.product(*ranges):
+            if sum(takes) != self.n // 2:
+                continue
+            pattern = 0
+            weight = 1
+            for columns, take in zip(groups.values(), takes):
+                weight *= math.comb(len(columns), take)
+                for c in columns[:take]:
+                    pattern |= 1 << c
+            yield pattern, tuple(step[code][pattern >> c & 1] for c, code in enumerate(state)), weight
+
+    def _shuffle_row(self, state, pattern, rng):
+        # A uniformly chosen row with as many S as pattern in every group of
+        # equal columns.
+        groups = {}
+        for c, code in enumerate(state):
+            groups.setdefault(code, []).append(c)
+        shuffled = 0
+        for columns in groups.values():
+            take = sum(pattern >> c & 1 for c in columns)
+            for c in rng.sample(columns, take):
+                shuffled |= 1 << c
+        return shuffled
+
+    def completions(self, state):
+        """
+        Returns how many ways the rows below state can be filled.
+        """
+        key = self._key(state)
+        count = self._memo.get(key)
+        if count is None:
+            ones, zeros, _, _ = self._columns[state[0]]
+            if ones + zeros == self.n:
+                count = 1
+            else:
+                # Recursion is one level per row, so at most n deep.
+                count = sum(weight * self.completions(child) for _, child, weight in self._children(state))
+            self._memo[key] = count
+        return count
+
+    def count(self):
+        """
+        Returns the number of valid full grids.
+        """
+        return self.completions(self._start())
+
+    def sample(self, rng=random):
+        """
+        Returns a valid grid as rows of 0 (M) and 1 (S), drawn uniformly from
+        all of them, or None when there is none.
+
+        Every row is picked with probability proportional to the number of
+        grids that continue it.
+        """
+        state = self._start()
+        total = self.completions(state)
+        if not total:
+            return None
+        rows = []
+        for _ in range(self.n):
+            pick = rng.randrange(total)
+            for pattern, child, weight in self._children(state):
+                total = self.completions(child)
+                if pick < weight * total:
+                    break
+                pick -= weight * total
+            if weight > 1:
+                pattern = self._shuffle_row(state, pattern, rng)
+                child = tuple(self._step[code][pattern >> c & 1] for c, code in enumerate(state))
+            rows.append(pattern)
+            state = child
+        return [[pattern >> c & 1 for c in range(self.n)] for pattern in rows]
+
+@functools.lru_cache(maxsize=4)
+def grid_counter(n, adjacency_limit=2):
+    """
+    Returns the shared GridCounter for (n, adjacency_limit), so its memo is
+    reused across calls.
+    """
+    return GridCounter(n, adjacency_limit)
+
+def count_grids(n, adjacency_limit=2):
+    return grid_counter(n, adjacency_limit).count()
+
+def sample_grid(n, adjacency_limit=2, rng=random):
+    return grid_counter(n, adjacency_limit).sample(rng)
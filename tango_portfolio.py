@@ -0,0 +1,141 @@
+"""
+Portfolio solving: race several solver configurations in worker processes and
+keep the first answer.
+
+    result = solve_portfolio(board, timeout=10)
+    result['solved'], result['winner'], result['elapsed']
+
+A configuration is (strategy, symmetry, swap). The worker rotates or
+reflects the puzzle by one of the 8 grid symmetries and, with swap, exchanges
+M and S before TangoBoard.solve(strategy) runs on it. The transformed puzzle
+has the same solutions, mapped back afterwards, but the engines meet its
+cells and values in another order. That order is what makes one run finish
+in milliseconds and another take seconds. Every engine is complete, so the
+first worker to report settles the puzzle either way and the rest are
+terminated.
+
+The report names the winning configuration, so the results of many
+puzzles show which configurations are worth making the default.
+"""
+import multiprocessing
+import os
+import random
+import time
+from multiprocessing.connection import wait
+
+from tango_core import SolveStats, TangoBoard, _pack_codes, _symmetry_tables
+
+# Names of the symmetries in the order of tango_core._symmetry_tables.
+SYMMETRY_NAMES = ('identity', 'rot90', 'rot180', 'rot270', 'mirror', 'flip', 'transpose', 'antitranspose')
+# Strategies that randomized configurations draw from; the row-major
+# backtracker only joins as a fallback.
+RACING_STRATEGIES = ('propagate', 'cdcl')
+
+def describe(config):
+    strategy, symmetry, swap = config
+    name = f"{strategy}/{SYMMETRY_NAMES[symmetry]}"
+    return name + "/swap" if swap else name
+
+def portfolio(size, seed=None):
+    """
+    Returns size configurations: the plain propagating and CDCL solvers, the
+    backtracker as a fallback, then distinct transformed propagate and CDCL
+    runs drawn from seed.
+    """
+    configs = [('propagate', 0, 0), ('cdcl', 0, 0), ('backtrack', 0, 0)][:size]
+    rng = random.Random(seed)
+    pool = [(strategy, symmetry, swap) for strategy in RACING_STRATEGIES
+            for symmetry in range(len(SYMMETRY_NAMES)) for swap in (0, 1)]
+    pool = [config for config in pool if config not in configs]
+    if size > len(configs):
+        configs.extend(rng.sample(pool, min(size - len(configs), len(pool))))
+    return configs
+
+def _variant(board, symmetry, swap):
+    """
+    Returns (puzzle, cell_src): board's puzzle moved by symmetry and swapped
+    when swap is set, where cell i of the puzzle is board's cell cell_src[i].
+    """
+    cell_src, edge_src = _symmetry_tables(board.n)[symmetry]
+    cells = board._cell_codes()
+    edges = board._edge_codes()
+    moved = [cells[i] for i in cell_src]
+    if swap:
+        moved = [(0, 2, 1)[code] for code in moved]
+    header = bytes((board.n, board.valid_num))
+    return TangoBoard.from_encoding(header + _pack_codes(moved) + _pack_codes([edges[i] for i in edge_src])), cell_src
+
+def _run(board, config, conn):
+    # Worker body: solves one variant and sends back (solved, grid, stats)
+    # with the grid in board's own orientation.
+    strategy, symmetry, swap = config
+    puzzle, cell_src = _variant(board, symmetry, swap)
+    stats = SolveStats()
+    solved = puzzle.solve(strategy, stats)
+    grid = None
+    if solved:
+        n = board.n
+        grid = [[-1] * n for _ in range(n)]
+        for i, src in enumerate(cell_src):
+            grid[src // n][src % n] = puzzle.cell_value(i // n, i % n) ^ swap
+    conn.send((solved, grid, stats.as_dict()))
+    conn.close()
+
+def solve_portfolio(board, configs=None, timeout=None, seed=None, apply=True):
+    """
+    Races configs (default: portfolio(os.cpu_count(), seed)), one process
+    each, and returns the first answer as a dict:
+        solved      True or False, or None when no worker answered in time
+        solution    the solved grid, or None
+        winner      describe() of the winning configuration, or None
+        stats       the winner's SolveStats.as_dict()
+        elapsed     wall time in seconds, process start-up included
+        timed_out   True when timeout seconds passed without an answer
+        failed      configurations whose worker died without answering
+
+    Losing workers are terminated as soon as there is an answer. With apply,
+    a solution is also written into board's empty cells.
+    """
+    if configs is None:
+        configs = portfolio(os.cpu_count() or 1, seed)
+    start = time.perf_counter()
+    workers = {}
+    result = {'solved': None, 'solution': None, 'winner': None, 'stats': None,
+              'elapsed': 0.0, 'timed_out': False, 'failed': []}
+    try:
+        for config in configs:
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(target=_run, args=(board, config, sender), daemon=True)
+            process.start()
+            sender.close()
+            workers[receiver] = (config, process)
+        while workers and result['winner'] is None:
+            remaining = None if timeout is None else timeout - (time.perf_counter() - start)
+            if remaining is not None and remaining <= 0:
+                result['timed_out'] = True
+                break
+            for receiver in wait(list(workers), remaining):
+                config, process = workers.pop(receiver)
+                try:
+                    solved, grid, stats = receiver.recv()
+                except EOFError:
+                    result['failed'].append(describe(config))
+                    continue
+                finally:
+                    receiver.close()
+                    process.join()
+                result.update(solved=solved, solution=grid, winner=describe(config), stats=stats)
+                break
+    finally:
+        for receiver, (_, process) in workers.items():
+            process.terminate()
+            receiver.close()
+        for _, process in workers.values():
+            process.join()
+    result['elapsed'] = time.perf_counter() - start
+    if apply and result['solved']:
+        for r, row in enumerate(result['solution']):
+            for c, value in enumerate(row):
+                if board.cell_value(r, c) == -1:
+                    board._place(r, c, value)
+    return result
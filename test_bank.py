@@ -0,0 +1,61 @@
+"""
+Round trip of boards through a puzzle bank, including writer recovery.
+"""
+import pytest
+
+import tango_bank
+from tango_core import TangoBoard
+
+def make_boards(n, count):
+    return [TangoBoard(n=n, known_cells=n * n // 3, relations=n, seed=seed) for seed in range(count)]
+
+def assert_same(loaded, board):
+    assert loaded.solution == board.solution
+    assert sorted(loaded.known_cells) == sorted(board.known_cells)
+    assert loaded.relations.copy() == board.relations.copy()
+    assert loaded.board == board.board
+
+@pytest.mark.parametrize("n", [4, 6, 8])
+def test_round_trip(tmp_path, n):
+    path = tmp_path / "puzzles.bank"
+    boards = make_boards(n, 6)
+    with tango_bank.PuzzleBankWriter(path, n, 2) as writer:
+        for board in boards[:4]:
+            writer.append(board)
+    with tango_bank.PuzzleBankWriter(path, n, 2) as writer:
+        for board in boards[4:]:
+            writer.append(board)
+    with tango_bank.PuzzleBank(path) as bank:
+        assert len(bank) == len(boards)
+        for k, board in enumerate(boards):
+            assert_same(TangoBoard.from_bank(bank, k), board)
+            assert bank.counts(k) == (len(board.known_cells), len(board.relations))
+        for (clues, relations), count in bank.keys().items():
+            found = bank.select(clues, relations)
+            assert len(found) == count
+            assert all(bank.counts(k) == (clues, relations) for k in found)
+
+def test_recover_after_interrupted_writer(tmp_path):
+    path = tmp_path / "puzzles.bank"
+    boards = make_boards(6, 5)
+    with tango_bank.PuzzleBankWriter(path, 6, 2) as writer:
+        writer.append(boards[0])
+    writer = tango_bank.PuzzleBankWriter(path, 6, 2)
+    for board in boards[1:]:
+        writer.append(board)
+    # The writer dies half way through one more record.
+    writer._file.write(b"\xff" * (writer.record_size // 2))
+    writer._file.close()
+    with pytest.raises(ValueError):
+        tango_bank.PuzzleBank(path)
+    assert tango_bank.recover(path) == len(boards)
+    with tango_bank.PuzzleBank(path) as bank:
+        assert len(bank) == len(boards)
+        for k, board in enumerate(boards):
+            assert_same(TangoBoard.from_bank(bank, k), board)
+
+def test_append_rejects_unsolved_board(tmp_path):
+    board = TangoBoard.from_encoding(make_boards(6, 1)[0].encode())
+    with tango_bank.PuzzleBankWriter(tmp_path / "puzzles.bank", 6, 2) as writer:
+        with pytest.raises(ValueError):
+            writer.append(board)
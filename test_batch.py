@@ -0,0 +1,62 @@
+"""
+Checks the NumPy batch validator against TangoBoard.is_valid_board().
+"""
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import tango_bank
+import tango_batch
+from tango_core import TangoBoard
+
+def mixed_boards(n, count, seed=0):
+    # Solutions with some cells erased and a few flipped, so that about half
+    # of them break a rule and every kind of violation shows up.
+    rng = random.Random(seed)
+    boards = []
+    for i in range(count):
+        board = TangoBoard(n=n, known_cells=n, relations=2 * n, seed=i)
+        cells = [row[:] for row in board.solution]
+        for r in range(n):
+            for c in range(n):
+                if rng.random() < 0.3:
+                    cells[r][c] = -1
+        for _ in range(rng.choice((0, 0, 1, 2, 3))):
+            r, c = rng.randrange(n), rng.randrange(n)
+            cells[r][c] = 1 - cells[r][c] if cells[r][c] >= 0 else rng.randrange(2)
+        board.board = cells
+        boards.append(board)
+    return boards
+
+@pytest.mark.parametrize("n, limit", [(4, 2), (6, 2), (8, 2), (8, 4)])
+def test_matches_is_valid_board(n, limit):
+    boards = mixed_boards(n, 200, seed=n + limit)
+    for board in boards:
+        board.valid_num = limit
+        board.board = board.board
+    cells, h_rel, v_rel = tango_batch.stack_boards(boards)
+    valid, codes = tango_batch.validate_batch(cells, h_rel, v_rel, adjacency_limit=limit, with_codes=True)
+    expected = [board.is_valid_board() for board in boards]
+    assert valid.tolist() == expected
+    assert 0 < sum(expected) < len(boards)
+    full = tango_batch.validate_batch(cells, h_rel, v_rel, adjacency_limit=limit, require_full=True)
+    filled = [all(value >= 0 for row in board.board for value in row) for board in boards]
+    assert full.tolist() == [ok and done for ok, done in zip(expected, filled)]
+
+def test_bank_arrays_match_records(tmp_path):
+    path = tmp_path / "puzzles.bank"
+    boards = [TangoBoard(n=6, known_cells=12, relations=6, seed=seed) for seed in range(10)]
+    with tango_bank.PuzzleBankWriter(path, 6, 2) as writer:
+        for board in boards:
+            writer.append(board)
+    with tango_bank.PuzzleBank(path) as bank:
+        solutions, givens, h_rel, v_rel = tango_batch.bank_arrays(bank)
+        for k in range(len(bank)):
+            solution, known_cells, h, v = bank.read(k)
+            assert solutions[k].tolist() == solution
+            assert sorted(zip(*np.nonzero(givens[k]))) == sorted((r, c) for r, c, _ in known_cells)
+            assert h_rel[k].ravel().tolist() == list(h)
+            assert v_rel[k].ravel().tolist() == list(v)
+        assert tango_batch.validate_batch(solutions, h_rel, v_rel, require_full=True).all()
@@ -0,0 +1,102 @@
+"""
+SolveCache hits across symmetric puzzles, in memory and from SQLite.
+"""
+import pytest
+
+from tango_cache import SolveCache
+from tango_core import TangoBoard
+
+def moves(n):
+    last = n - 1
+    return [
+        lambda r, c: (r, c),
+        lambda r, c: (c, last - r),
+        lambda r, c: (last - r, last - c),
+        lambda r, c: (last - c, r),
+        lambda r, c: (r, last - c),
+        lambda r, c: (last - r, c),
+        lambda r, c: (c, r),
+        lambda r, c: (last - c, last - r),
+    ]
+
+def transformed(board, move, swap):
+    # (puzzle, solution) of board moved by move, with M and S exchanged when swap is set.
+    n = board.n
+    puzzle = TangoBoard.from_encoding(board.encode())
+    puzzle.relations = {(move(*a), move(*b)): rel for (a, b), rel in board.relations.items()}
+    puzzle.known_cells = [move(r, c) + (value ^ swap,) for r, c, value in board.known_cells]
+    cells = [[-1] * n for _ in range(n)]
+    for r, c, value in puzzle.known_cells:
+        cells[r][c] = value
+    puzzle.board = cells
+    solution = [[-1] * n for _ in range(n)]
+    for r in range(n):
+        for c in range(n):
+            r2, c2 = move(r, c)
+            solution[r2][c2] = board.solution[r][c] ^ swap
+    return puzzle, solution
+
+def unique_board(seed):
+    board = TangoBoard(n=6, seed=seed)
+    assert board.is_unique()
+    return board
+
+def test_symmetric_puzzles_hit_with_their_own_solution():
+    board = unique_board(0)
+    cache = SolveCache(maxsize=16)
+    assert board.solve(cache=cache)
+    assert board.board == board.solution
+    assert cache.cache_info()['misses'] == 1
+    for move in moves(6):
+        for swap in (0, 1):
+            puzzle, solution = transformed(board, move, swap)
+            assert cache.lookup(puzzle) == {'solution': solution, 'unique': True}
+            assert puzzle.solve(cache=cache)
+            assert puzzle.board == solution
+    info = cache.cache_info()
+    assert (info['misses'], info['hits'], info['size']) == (1, 32, 1)
+
+def test_moves_keep_hitting_and_conflicts_are_solved_directly():
+    board = unique_board(1)
+    cache = SolveCache()
+    empty = [(r, c) for r in range(6) for c in range(6) if board.cell_value(r, c) == -1]
+    r, c = empty[0]
+    board.set_cell(r, c, board.solution[r][c])
+    assert board.solve(cache=cache) and board.board == board.solution
+    board = unique_board(1)
+    board.set_cell(r, c, 1 - board.solution[r][c])
+    assert not board.solve(cache=cache)
+    assert cache.cache_info()['misses'] == 1
+
+def test_lru_evicts_oldest():
+    cache = SolveCache(maxsize=2)
+    boards = [unique_board(seed) for seed in range(3)]
+    for board in boards:
+        board.solve(cache=cache)
+    assert cache.cache_info()['evictions'] == 1
+    assert cache.lookup(boards[0]) is None
+    assert cache.lookup(boards[2]) is not None
+
+def test_sqlite_tier_survives_a_new_cache(tmp_path):
+    path = str(tmp_path / "solves.sqlite")
+    board = unique_board(2)
+    with SolveCache(path=path) as cache:
+        board.solve(cache=cache)
+    puzzle, solution = transformed(board, moves(6)[1], 1)
+    with SolveCache(path=path) as cache:
+        assert puzzle.solve(cache=cache)
+        assert puzzle.board == solution
+        info = cache.cache_info()
+        assert (info['hits'], info['disk_hits'], info['misses']) == (1, 1, 0)
+
+def test_unsolvable_puzzle_is_cached_as_such():
+    # M ? M ? M ? with (0, 0) = (0, 1) needs four Ms in the first row.
+    puzzle = TangoBoard.from_encoding(unique_board(3).encode())
+    puzzle.relations = {((0, 0), (0, 1)): '='}
+    puzzle.known_cells = [(0, 0, 0), (0, 2, 0), (0, 4, 0)]
+    puzzle.board = [[0, -1, 0, -1, 0, -1]] + [[-1] * 6 for _ in range(5)]
+    cache = SolveCache()
+    assert not puzzle.solve(cache=cache)
+    assert cache.lookup(puzzle) == {'solution': None, 'unique': False}
+    assert not puzzle.solve(cache=cache)
+    assert cache.cache_info()['misses'] == 1
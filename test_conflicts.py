@@ -0,0 +1,59 @@
+"""
+Checks the incrementally kept conflict sets against a full rescan.
+"""
+import random
+
+import pytest
+
+from tango_core import TangoBoard
+
+def rescan(board):
+    # Cells breaking a rule, found from scratch: every cell of a symbol that
+    # fills more than half a line, every cell of a run over the limit and
+    # both cells of a broken relation.
+    n, limit = board.n, board.valid_num
+    grid = [[board.cell_value(r, c) for c in range(n)] for r in range(n)]
+    lines = [[(r, c) for c in range(n)] for r in range(n)] + [[(r, c) for r in range(n)] for c in range(n)]
+    cells = set()
+    for line in lines:
+        for value in (0, 1):
+            holding = [cell for cell in line if grid[cell[0]][cell[1]] == value]
+            if len(holding) > n // 2:
+                cells.update(holding)
+        for start in range(n - limit):
+            window = line[start:start + limit + 1]
+            values = {grid[r][c] for r, c in window}
+            if len(values) == 1 and -1 not in values:
+                cells.update(window)
+    for ((r1, c1), (r2, c2)), rel in board.relations.items():
+        a, b = grid[r1][c1], grid[r2][c2]
+        if a != -1 and b != -1 and (a == b) != (rel == '='):
+            cells.update(((r1, c1), (r2, c2)))
+    return sorted(cells)
+
+@pytest.mark.parametrize("n, limit", [(4, 2), (6, 2), (6, 3), (8, 2)])
+def test_conflicts_match_rescan(n, limit):
+    rng = random.Random(n * 10 + limit)
+    for seed in range(3):
+        board = TangoBoard(n=n, known_cells=n, relations=n, adjacency_limit=limit, seed=seed)
+        for step in range(300):
+            roll = rng.random()
+            r, c = rng.randrange(n), rng.randrange(n)
+            if roll < 0.15:
+                if rng.random() < 0.5:
+                    key = ((r, c), (r, c + 1)) if c < n - 1 else ((r, c), (r, c - 1))
+                else:
+                    key = ((r, c), (r + 1, c)) if r < n - 1 else ((r, c), (r - 1, c))
+                if key in board.relations and rng.random() < 0.5:
+                    del board.relations[key]
+                else:
+                    board.relations[key] = rng.choice("=×")
+            elif roll < 0.4:
+                board.set_cell(r, c, -1)
+            elif roll < 0.42:
+                board.board = board.board
+            else:
+                board.set_cell(r, c, rng.randrange(2))
+            expected = rescan(board)
+            assert board.conflicts() == expected, step
+            assert board.is_valid_board() == (not expected), step
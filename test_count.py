@@ -0,0 +1,41 @@
+"""
+Checks the grid counter against brute force and known totals.
+"""
+import itertools
+import random
+
+import pytest
+
+import tango_count
+from tango_core import TangoBoard
+
+def valid_grid(grid, limit):
+    n = len(grid)
+    for line in list(grid) + list(zip(*grid)):
+        if sum(line) != n // 2:
+            return False
+        if any(len(list(run)) > limit for _, run in itertools.groupby(line)):
+            return False
+    return True
+
+@pytest.mark.parametrize("limit", [1, 2])
+def test_count_matches_brute_force(limit):
+    grids = [[bits[r * 4:r * 4 + 4] for r in range(4)] for bits in itertools.product((0, 1), repeat=16)]
+    assert tango_count.count_grids(4, limit) == sum(valid_grid(grid, limit) for grid in grids)
+
+@pytest.mark.parametrize("n, limit, total", [(6, 2, 11222), (8, 2, 12413918), (16, 1, 2)])
+def test_known_totals(n, limit, total):
+    assert tango_count.count_grids(n, limit) == total
+
+def test_samples_are_valid_grids():
+    rng = random.Random(1)
+    for n, limit in [(6, 2), (8, 2), (12, 6)]:
+        for _ in range(5):
+            assert valid_grid(tango_count.sample_grid(n, limit, rng), limit)
+
+def test_uniform_generation_refuses_impractical_sizes():
+    board = TangoBoard(n=12, seed=1)
+    with pytest.raises(ValueError):
+        board.generate_solution(uniform=True)
+    assert tango_count.practical(8, 2) and tango_count.practical(14, 7)
+    assert not tango_count.practical(10, 2) and not tango_count.practical(16, 8)
@@ -0,0 +1,70 @@
+"""
+Round trips through encode()/from_encoding() and symmetry of puzzle_hash().
+"""
+import pytest
+
+from tango_core import TangoBoard
+
+def moves(n):
+    last = n - 1
+    return [
+        lambda r, c: (r, c),
+        lambda r, c: (c, last - r),
+        lambda r, c: (last - r, last - c),
+        lambda r, c: (last - c, r),
+        lambda r, c: (r, last - c),
+        lambda r, c: (last - r, c),
+        lambda r, c: (c, r),
+        lambda r, c: (last - c, last - r),
+    ]
+
+def transformed(board, move, swap):
+    # The same puzzle moved by move and with M and S exchanged when swap is set.
+    n = board.n
+    result = TangoBoard.from_encoding(board.encode())
+    result.relations = {(move(*a), move(*b)): rel for (a, b), rel in board.relations.items()}
+    result.known_cells = [move(r, c) + (value ^ swap,) for r, c, value in board.known_cells]
+    cells = [[-1] * n for _ in range(n)]
+    for r, c, value in result.known_cells:
+        cells[r][c] = value
+    result.board = cells
+    return result
+
+@pytest.mark.parametrize("n", [4, 6, 8])
+def test_round_trip(n):
+    for seed in range(5):
+        board = TangoBoard(n=n, known_cells=n * n // 3, relations=n, seed=seed)
+        copy = TangoBoard.from_encoding(board.encode())
+        assert (copy.n, copy.valid_num) == (board.n, board.valid_num)
+        assert sorted(copy.known_cells) == sorted(board.known_cells)
+        assert copy.relations.copy() == board.relations.copy()
+        assert copy.board == board.board
+        assert copy.encode() == board.encode()
+
+def test_moves_do_not_change_the_encoding():
+    board = TangoBoard(n=6, seed=1)
+    encoding, digest = board.encode(), board.puzzle_hash(canonical=True)
+    for r in range(6):
+        for c in range(6):
+            if board.cell_value(r, c) == -1:
+                board.set_cell(r, c, board.solution[r][c])
+    assert board.encode() == encoding
+    assert board.puzzle_hash(canonical=True) == digest
+
+@pytest.mark.parametrize("n", [4, 6])
+def test_hash_is_symmetric(n):
+    for seed in range(3):
+        board = TangoBoard(n=n, known_cells=n * n // 3, relations=n, seed=seed)
+        digest = board.puzzle_hash(canonical=True)
+        for move in moves(n):
+            for swap in (0, 1):
+                variant = transformed(board, move, swap)
+                assert variant.puzzle_hash(canonical=True) == digest
+                assert variant.encode(canonical=True) == board.encode(canonical=True)
+
+def test_different_puzzles_hash_apart():
+    board = TangoBoard(n=6, seed=3)
+    other = TangoBoard.from_encoding(board.encode())
+    r, c, value = other.known_cells.pop()
+    other.set_cell(r, c, -1)
+    assert other.puzzle_hash(canonical=True) != board.puzzle_hash(canonical=True)
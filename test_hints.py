@@ -0,0 +1,94 @@
+"""
+Checks candidates() and next_hint() against every completion of the position
+while random moves and relation edits are played.
+"""
+import copy
+import itertools
+import random
+
+import pytest
+
+from tango_core import TangoBoard
+
+def all_grids(n, limit):
+    def runs_ok(line):
+        return all(len(list(run)) <= limit for _, run in itertools.groupby(line))
+    rows = [row for row in itertools.product((0, 1), repeat=n)
+            if sum(row) == n // 2 and runs_ok(row)]
+    grids = []
+
+    def extend(grid):
+        if len(grid) == n:
+            grids.append(grid)
+            return
+        for row in rows:
+            columns = list(zip(*grid, row))
+            if all(sum(col) <= n // 2 and len(grid) + 1 - sum(col) <= n // 2 and runs_ok(col)
+                   for col in columns):
+                extend(grid + [row])
+    extend([])
+    return grids
+
+def completions(board, grids):
+    filled = [(r, c, board.cell_value(r, c)) for r in range(board.n) for c in range(board.n)
+              if board.cell_value(r, c) != -1]
+    relations = list(board.relations.items())
+    found = []
+    for grid in grids:
+        if any(grid[r][c] != value for r, c, value in filled):
+            continue
+        if all((grid[r1][c1] == grid[r2][c2]) == (rel == "=")
+               for ((r1, c1), (r2, c2)), rel in relations):
+            found.append(grid)
+    return found
+
+def forced_cells(board):
+    board.next_hint()
+    forced = {}
+    for hints in list(board._cell_hints.values()) + board._line_hints:
+        forced.update(hints)
+    return forced
+
+def random_step(board, rng):
+    n = board.n
+    roll = rng.random()
+    if roll < 0.1:
+        r, c = rng.randrange(n), rng.randrange(n - 1)
+        key = ((r, c), (r, c + 1)) if rng.random() < 0.5 else ((c, r), (c + 1, r))
+        if key in board.relations:
+            del board.relations[key]
+        else:
+            board.relations[key] = rng.choice("=×")
+    elif roll < 0.3:
+        filled = [(r, c) for r in range(n) for c in range(n) if board.cell_value(r, c) != -1]
+        if filled:
+            board.set_cell(*rng.choice(filled), -1)
+    else:
+        empty = [(r, c) for r in range(n) for c in range(n) if board.cell_value(r, c) == -1]
+        if empty:
+            r, c = rng.choice(empty)
+            value = board.solution[r][c] if rng.random() < 0.8 else rng.randrange(2)
+            board.set_cell(r, c, value)
+
+@pytest.mark.parametrize("n", [4, 6])
+def test_hints_agree_with_completions(n):
+    grids = all_grids(n, 2)
+    rng = random.Random(n)
+    for seed in range(4):
+        board = TangoBoard(n=n, known_cells=n // 2, relations=n, seed=seed)
+        for _ in range(40):
+            random_step(board, rng)
+            found = completions(board, grids)
+            forced = forced_cells(board)
+            # A fresh cache must reach the same hints as the incremental one.
+            fresh = copy.deepcopy(board)
+            fresh._hint_seen = None
+            assert forced_cells(fresh) == forced
+            if not found:
+                continue
+            for (r, c), value in forced.items():
+                assert all(grid[r][c] == value for grid in found)
+            for r in range(n):
+                for c in range(n):
+                    if board.cell_value(r, c) == -1:
+                        assert {grid[r][c] for grid in found} <= set(board.candidates(r, c))
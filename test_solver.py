@@ -0,0 +1,66 @@
+"""
+Checks every solve strategy against brute force over all valid grids.
+"""
+import itertools
+
+import pytest
+
+from tango_core import TangoBoard
+
+STRATEGIES = ("backtrack", "propagate", "cdcl")
+
+def all_grids(n, limit):
+    # Every full grid with balanced lines and no run over limit, row by row.
+    def runs_ok(line):
+        return all(len(list(run)) <= limit for _, run in itertools.groupby(line))
+    rows = [row for row in itertools.product((0, 1), repeat=n)
+            if sum(row) == n // 2 and runs_ok(row)]
+    grids = []
+
+    def extend(grid):
+        if len(grid) == n:
+            grids.append(grid)
+            return
+        for row in rows:
+            columns = list(zip(*grid, row))
+            if all(sum(col) <= n // 2 and len(grid) + 1 - sum(col) <= n // 2 and runs_ok(col)
+                   for col in columns):
+                extend(grid + [row])
+    extend([])
+    return grids
+
+def matches(board, grid):
+    if any(value != -1 and grid[r][c] != value
+           for r, row in enumerate(board.board) for c, value in enumerate(row)):
+        return False
+    for ((r1, c1), (r2, c2)), rel in board.relations.items():
+        if (grid[r1][c1] == grid[r2][c2]) != (rel == "="):
+            return False
+    return True
+
+def puzzles(n, count):
+    # Sparse puzzles, many with several solutions, and copies with one given
+    # flipped, some of which have none.
+    for seed in range(count):
+        board = TangoBoard(n=n, known_cells=n, relations=n // 2, seed=seed)
+        yield board
+        flipped = TangoBoard(n=n, known_cells=n, relations=n // 2, seed=seed)
+        r, c, value = flipped.known_cells[0]
+        flipped.set_cell(r, c, 1 - value)
+        yield flipped
+
+@pytest.mark.parametrize("n", [4, 6])
+def test_solvers_agree_with_brute_force(n):
+    grids = all_grids(n, 2)
+    for board in puzzles(n, 15):
+        solutions = [grid for grid in grids if matches(board, grid)]
+        assert board.count_solutions(limit=len(grids)) == len(solutions)
+        assert board.is_unique() == (len(solutions) == 1)
+        for strategy in STRATEGIES:
+            solved = board.solved(strategy)
+            if not solutions:
+                assert solved is None, strategy
+                continue
+            assert solved is not None, strategy
+            assert solved.is_valid_board()
+            assert [tuple(row) for row in solved.board] in solutions